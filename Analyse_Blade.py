@@ -0,0 +1,49 @@
+##### Import modules #####
+import os
+import tempfile
+import numpy as np
+import matplotlib.pyplot as plt
+from Classes import Airfoil, Blade
+from Classes.Command_Line import main
+import Inputs as c
+
+##### Calculations #####
+Foil = Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)
+
+Design = Blade(c.radius, c.no_segments, c.no_blades, Foil)
+Design.design_blade(c.TSR)
+Design.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+Design.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+
+# Off-design analysis of the fixed geometry, over a grid of TSR and wind speeds
+tsr_list = np.arange(1, 12, 0.1)
+wind_list = [6, 9, c.windspeed]
+Result = Design.analyse(tsr_list, wind_list)
+print(Result)
+
+# The geometry read back from a saved csv has to give the same result
+with tempfile.TemporaryDirectory() as folder:
+    Design.save_csv(os.path.join(folder, 'Blade_Data'))
+    Imported = Blade(No_Blades=c.no_blades)
+    Imported.import_blade(os.path.join(folder, 'Blade_Data'))
+    Imported_Result = Imported.analyse(tsr_list, wind_list)
+
+    # and so has the command line, from the csv it wrote (with a blade count other than the default)
+    paths = [os.path.join(folder, name) for name in ('CLI_Blade.csv', 'From_CSV.npz', 'Designed.npz')]
+    assert main(['--set', 'no_blades=3', 'fix', '-o', paths[0]]) == 0
+    assert main(['--set', 'no_blades=3', 'analyse', '--blade', paths[0], '-o', paths[1]]) == 0
+    assert main(['--set', 'no_blades=3', 'analyse', '-o', paths[2]]) == 0
+    with np.load(paths[1]) as From_CSV, np.load(paths[2]) as Designed:
+        CLI_match = np.allclose(From_CSV['Cp'], Designed['Cp'], equal_nan=True)
+assert np.allclose(Imported_Result.Cp, Result.Cp, equal_nan=True), 'The blade imported from csv does not analyse the same'
+assert CLI_match, 'The command line does not analyse a blade read from csv the same'
+
+##### Plotting #####
+for j, wind_speed in enumerate(wind_list):
+    plt.plot(tsr_list, Result.Cp[:, j] * 100, label=f'Cp at {wind_speed} m/s')
+plt.plot(tsr_list, Result.Ct[:, -1] * 100, '--', label=f'Ct at {wind_list[-1]} m/s')
+plt.xlabel('Tip Speed Ratio (TSR) [-]')
+plt.ylabel('Coefficient [%]')
+plt.grid()
+plt.legend()
+plt.show()
@@ -0,0 +1,33 @@
+##### Import modules #####
+import sys
+from Classes.Benchmarks import run_benchmarks, save_results, load_results, compare_results
+
+##### Inputs #####
+output_file = 'Benchmark_Results.json'      # results of this run
+baseline_file = 'Benchmark_Baseline.json'   # results to compare against, rerun with --save-baseline to replace it
+# The timings depend on the machine, so no baseline is shipped: make one on the machine the comparisons are run on,
+# before the change to be checked, e.g. git stash; python Benchmark.py --save-baseline; git stash pop; python Benchmark.py
+tolerance = 0.25                            # [-], slow down past which a workload counts as a regression
+quick = '--quick' in sys.argv               # leave out the 5000 segment workloads and use smaller file batches
+select = [arg for arg in sys.argv[1:] if not arg.startswith('--')] # only run workloads starting with these names
+
+##### Calculations #####
+results = run_benchmarks(select, quick, verbose=True)
+save_results(results, output_file)
+print(f'Results saved to {output_file}')
+
+if '--save-baseline' in sys.argv:
+    save_results(results, baseline_file)
+    print(f'Baseline saved to {baseline_file}')
+    sys.exit(0)
+
+try:
+    baseline = load_results(baseline_file)
+except FileNotFoundError:
+    print(f'No baseline in {baseline_file}, run with --save-baseline to make one')
+    sys.exit(0)
+
+comparison, regressions = compare_results(results, baseline, tolerance)
+for name, (before, now, ratio) in comparison.items():
+    print(f"{name:<32} {before * 1000:>10.3f} ms -> {now * 1000:>10.3f} ms  x{ratio:.2f}{'  REGRESSION' if name in regressions else ''}")
+sys.exit(1 if regressions else 0)
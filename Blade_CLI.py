@@ -0,0 +1,9 @@
+##### Import modules #####
+import sys
+from Classes.Command_Line import main
+
+##### Command line #####
+# e.g. python Blade_CLI.py --config design.json fix --prepare -o blade.npz
+#      python Blade_CLI.py sweep --tsr 3 7 0.01 --optimise -o sweep.json
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+##### Import modules #####
+import sys
+from Classes import Airfoil, Blade
+from Classes.Energy_Yield import PowerCurve, stream_wind, energy_yield
+import Inputs as c
+
+##### Inputs #####
+wind_file = sys.argv[1]     # wind speed series: .csv/.txt (first column, one header line) or raw float32 .bin/.npy
+time_step = 1               # [s], time between the wind speed samples
+rated_power = None          # [W], power limit of the generator (None = no limit)
+
+##### Calculations #####
+Foil = Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)
+
+Design = Blade(c.radius, c.no_segments, c.no_blades, Foil)
+Design.design_blade(c.TSR)
+Design.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+Design.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+
+Curve = PowerCurve.from_blade(Design, rated_power=rated_power)
+print(Curve)
+print(energy_yield(Curve, stream_wind(wind_file), time_step))
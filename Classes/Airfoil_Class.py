@@ -1,17 +1,37 @@
 ##### Import modules #####
 import numpy as np
+from .Airfoil_Registry import registry
+from .Polar_Class import Polar
+from .Instrumentation import timed
 
 ##### Airfoil class #####
 # Defines the cross sectional section of the wind turbine blade
 class Airfoil:
+    __slots__ = ('name', 'Cl', 'Cd', 'AoA_opt', 'polar')
 
     ## Defines the attributes of this object
-    def __init__(self, name=None, Cl=0, Cd=0, AoA_opt=0):
+    def __init__(self, name=None, Cl=0, Cd=0, AoA_opt=0, polar=None):
         self.name = name                    # String for name of airfoil being used, to provide the shape
         self.Cl = Cl                        # Lift coefficient of airfoil at required Reynolds number
         self.Cd = Cd                        # Drag coefficient of airfoil at required Reynolds number
         self.AoA_opt = np.deg2rad(AoA_opt)  # Optimal angle of attack. Input in Degrees, calculates in Radians
+        self.polar = polar                  # Full Cl/Cd/Cm tables (Polar), if they are available
+
+    ## Creates the airfoil at its best Cl/Cd, read from its polar at the given Reynolds number
+    @classmethod
+    def from_polar(cls, name, polar=None, re=None):
+        if polar is None:
+            polar = Polar.load(name)
+        AoA_opt, Cl, Cd = polar.optimum(re)
+        return cls(name, float(Cl), float(Cd), float(AoA_opt), polar)
     
+    ## The airfoil is shared, not copied, when the segments using it are copied
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     ## Defines the information that will be shown when this object is printed
     def __str__(self):
         return f"""##### Airfoil Attributes #####
@@ -20,25 +40,12 @@ class Airfoil:
                 Cd:          {format(self.Cd, '.2g')}
                 Optimal AoA: {format(np.rad2deg(self.AoA_opt), '.2g')}"""
 
-    ## Method to take the shape coordinates of the airfoil from the Airfoil_Data folder
+    ## Method to take the shape coordinates of the airfoil from the Airfoil_Data folder (centred, read-only arrays)
     def shape(self):
-        with open(f'Airfoil_Data/{self.name}') as file:
-            x_coords = []
-            y_coords = []
-
-            next(file)
-            for line in file:
-                columns = line.strip().split()
-
-                x_coords.append(float(columns[0]))
-                y_coords.append(float(columns[1]))
-
-        # Calculate the mean of the x and y coordinates
-        x_mean = sum(x_coords) / len(x_coords)
-        y_mean = sum(y_coords) / len(y_coords)
-
-        # Center the coordinates around the origin
-        x_coords_centered = [x - x_mean for x in x_coords]
-        y_coords_centered = [y - y_mean for y in y_coords]
+        geometry = self.geometry()
+        return [geometry.x, geometry.y]
 
-        return [x_coords_centered, y_coords_centered]
\ No newline at end of file
+    ## Method to give the parsed geometry of the airfoil, only read from file the first time or after it changes
+    @timed('Airfoil.geometry')
+    def geometry(self):
+        return registry.get(f'Airfoil_Data/{self.name}')
@@ -0,0 +1,97 @@
+##### Import modules #####
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from .Instrumentation import count
+
+##### Airfoil geometry class #####
+# The parsed coordinates of one airfoil file, centred around the origin (read-only, shared by every user)
+class AirfoilGeometry:
+
+    ## Defines the attributes of this object
+    def __init__(self, path, x_coords, y_coords, mtime):
+        self.path = path
+        self.mtime = mtime                                      # modification time of the file when it was read [ns]
+        self.centroid = (float(x_coords.mean()), float(y_coords.mean()))    # mean of the coordinates, as given in the file
+
+        # Center the coordinates around the origin
+        self.x = np.ascontiguousarray(x_coords - self.centroid[0])
+        self.y = np.ascontiguousarray(y_coords - self.centroid[1])
+        self.x.setflags(write=False)
+        self.y.setflags(write=False)
+
+        self.extents = (float(self.x.min()), float(self.x.max()), float(self.y.min()), float(self.y.max())) # centred x_min, x_max, y_min, y_max
+        self.area = 0.5 * abs(float(np.sum(self.x * np.roll(self.y, -1) - np.roll(self.x, -1) * self.y))) # enclosed by the outline [chord^2]
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### Airfoil Geometry #####
+                File:        {self.path}
+                Points:      {len(self.x)}
+                Width [-]:   {format(self.extents[1] - self.extents[0], '.3g')}
+                Height [-]:  {format(self.extents[3] - self.extents[2], '.3g')}
+                Area [-]:    {format(self.area, '.3g')}"""
+
+##### Airfoil registry class #####
+# Parses each airfoil coordinate file once, and hands out the same arrays until the file changes
+class AirfoilRegistry:
+
+    ## Defines the attributes of this object
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries  # least recently used entries are dropped past this size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    ## Number of airfoils held
+    def __len__(self):
+        return len(self._entries)
+
+    ## Method to give the geometry of an airfoil file, reading it only if it is new or has been modified
+    def get(self, path):
+        mtime = os.stat(path).st_mtime_ns
+
+        with self._lock:
+            geometry = self._entries.get(path)
+            if geometry is not None and geometry.mtime == mtime:
+                self._entries.move_to_end(path)
+                count('airfoil.registry_hits')
+                return geometry
+
+        geometry = read_geometry(path, mtime)
+        count('airfoil.shape_reads')
+
+        with self._lock:
+            self._entries[path] = geometry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return geometry
+
+    ## Method to forget every parsed airfoil
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+## Function to read the coordinates of an airfoil file (first line is the name of the airfoil)
+def read_geometry(path, mtime=None):
+    coords = np.loadtxt(path, skiprows=1, usecols=(0, 1), ndmin=2)
+    if mtime is None:
+        mtime = os.stat(path).st_mtime_ns
+    return AirfoilGeometry(path, coords[:, 0], coords[:, 1], mtime)
+
+## Function to scale and rotate airfoil coordinates by a chord and twist angle (both may be arrays, one per section)
+def scale_shape(x_coords, y_coords, chord, twist):
+    chord = np.asarray(chord, dtype=float)[..., None]
+    twist = np.asarray(twist, dtype=float)[..., None]
+
+    cos_twist = np.cos(twist)
+    sin_twist = np.sin(twist)
+    x_rotated = chord * (x_coords * cos_twist - y_coords * sin_twist)
+    y_rotated = chord * (x_coords * sin_twist + y_coords * cos_twist)
+
+    return x_rotated, y_rotated
+
+# Process-wide registry used by every Airfoil
+registry = AirfoilRegistry()
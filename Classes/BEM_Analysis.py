@@ -0,0 +1,185 @@
+##### Import modules #####
+import numpy as np
+from .Instrumentation import count, convergence
+from .Config import DEFAULT
+
+##### BEM result class #####
+# Holds the solution of an off-design analysis. Spanwise values have the segments along the last axis
+class BEMResult:
+
+    ## Defines the attributes of this object
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### BEM Analysis #####
+                Operating points:    {self.Cp.size}
+                Max Cp [%]:          {round(float(np.nanmax(self.Cp)) * 100, 2)}
+                Max Ct [%]:          {round(float(np.nanmax(self.Ct)) * 100, 2)}
+                Converged [%]:       {round(float(self.converged.mean()) * 100, 1)}"""
+
+## Function to give a Cl, Cd(alpha [°], Re) function for an airfoil: its polar if it has one, otherwise a rough stand-in
+## made from its design point (thin airfoil lift slope through Cl at AoA_opt, capped at 1.25 * Cl, constant Cd)
+def airfoil_coefficients(airfoil):
+    if getattr(airfoil, 'polar', None) is not None:
+        polar = airfoil.polar
+        return lambda alpha, re: (polar.cl(alpha, re), polar.cd(alpha, re))
+
+    Cl_max = 1.25 * abs(airfoil.Cl)
+    def coefficients(alpha, re):
+        Cl = np.clip(airfoil.Cl + 2 * np.pi * (np.deg2rad(alpha) - airfoil.AoA_opt), -Cl_max, Cl_max)
+        return Cl, np.full(np.shape(Cl), float(airfoil.Cd))
+    return coefficients
+
+## Function to give the coefficients function of a blade whose segments may use different airfoils (e.g. the cylinder)
+def segment_coefficients(airfoils):
+    groups = {}
+    for i, airfoil in enumerate(airfoils):
+        groups.setdefault(id(airfoil), (airfoil, []))[1].append(i)
+
+    if len(groups) == 1:
+        return airfoil_coefficients(airfoils[0])
+    groups = [(airfoil_coefficients(airfoil), np.array(index)) for airfoil, index in groups.values()]
+
+    def coefficients(alpha, re):
+        Cl = np.empty(np.shape(alpha))
+        Cd = np.empty(np.shape(alpha))
+        for function, index in groups:
+            Cl[..., index], Cd[..., index] = function(alpha[..., index], re[..., index])
+        return Cl, Cd
+    return coefficients
+
+## Function to solve the BEM equations for a fixed geometry. Everything broadcasts together with the segments along the
+## last axis, so a whole grid of operating points (and even of geometries) is solved at once. Twist is in radians.
+## Each element is reduced to one residual in the flow angle (Ning, 2014), which is bracketed and solved by false position,
+## so it converges for every element that has a solution, without any relaxation
+def solve_bem(position, chord, twist, length, radius, no_blades, tsr, wind_speed, coefficients, tip_loss=True, hub_loss=True,
+              hub_radius=None, air_density=None, viscosity=None, tol=1e-10, max_iter=100, config=None):
+    air_density, _, viscosity = (DEFAULT if config is None else config).environment(air_density, None, viscosity)
+    position, chord, twist, length, tsr, wind_speed = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (position, chord, twist, length, tsr, wind_speed)))
+    if hub_radius is None: # inner edge of the first segment
+        hub_radius = max(float(np.min(position * radius - length / 2)), 0)
+
+    element = _Element(position, chord, twist, tsr, wind_speed, radius, no_blades, coefficients, tip_loss, hub_loss, hub_radius, air_density, viscosity)
+    eps = 1e-6
+
+    with np.errstate(all='ignore'):
+        # Bracket: windmill (0, pi/2], then propeller brake [-pi/4, 0), then (pi/2, pi)
+        lower = np.full(position.shape, np.nan)
+        upper = np.full(position.shape, np.nan)
+        for low, high in ((eps, np.pi/2), (-np.pi/4, -eps), (np.pi/2, np.pi - eps)):
+            empty = np.isnan(lower)
+            f_low = element.residual(np.full(position.shape, low))
+            f_high = element.residual(np.full(position.shape, high))
+            found = empty & np.isfinite(f_low) & np.isfinite(f_high) & (np.signbit(f_low) != np.signbit(f_high))
+            lower[found] = low
+            upper[found] = high
+
+        # False position (Illinois) on the flow angle, all elements at once
+        bracketed = ~np.isnan(lower)
+        lower = np.where(bracketed, lower, eps)
+        upper = np.where(bracketed, upper, np.pi/2)
+        f_lower = element.residual(lower)
+        f_upper = element.residual(upper)
+        flow = 0.5 * (lower + upper)
+        side = np.zeros(position.shape, dtype=int)
+        for iteration in range(1, max_iter + 1):
+            flow = np.where(f_upper != f_lower, upper - f_upper * (upper - lower) / (f_upper - f_lower), 0.5 * (lower + upper))
+            flow = np.where((flow > lower) & (flow < upper), flow, 0.5 * (lower + upper))
+            f_flow = element.residual(flow)
+
+            low_side = np.signbit(f_flow) == np.signbit(f_lower)
+            lower, f_lower = np.where(low_side, flow, lower), np.where(low_side, f_flow, f_lower)
+            upper, f_upper = np.where(low_side, upper, flow), np.where(low_side, f_upper, f_flow)
+
+            # Illinois step: halve the end that has stayed put twice in a row
+            f_upper = np.where(low_side & (side == 1), 0.5 * f_upper, f_upper)
+            f_lower = np.where(~low_side & (side == -1), 0.5 * f_lower, f_lower)
+            side = np.where(low_side, 1, -1)
+
+            if np.all((upper - lower)[bracketed] < tol):
+                break
+
+        converged = bracketed & ((upper - lower < tol) | (f_flow == 0))
+        count('bem.unbracketed', int(np.count_nonzero(~bracketed)))
+        convergence('bem', converged, iteration * converged.size, position)
+        flow = np.where(bracketed, flow, np.nan)
+        values = element.values(flow)
+
+    a_lin, a_ang = values['a_lin'], values['a_ang']
+    x = tsr * position
+    rel_velocity = wind_speed * np.sqrt((1 - a_lin)**2 + ((1 + a_ang) * x)**2)
+    r = position * radius
+
+    # Forces on each segment (dM is the tangential force, as in Segment), then the totals
+    force = 0.5 * air_density * rel_velocity**2 * chord * length * no_blades
+    dT = force * values['C_a']
+    dM = force * values['C_m']
+
+    wind = wind_speed[..., 0]
+    ang_vel = tsr[..., 0] * wind / radius
+    area = np.pi * radius**2
+    power = ang_vel * np.sum(dM * r, axis=-1)
+    Cp = power / (0.5 * air_density * wind**3 * area)
+    Ct = np.sum(dT, axis=-1) / (0.5 * air_density * wind**2 * area)
+
+    return BEMResult(a_lin=a_lin, a_ang=a_ang, flow=flow, alpha=np.rad2deg(values['alpha']), Cl=values['Cl'], Cd=values['Cd'],
+                     re=air_density * rel_velocity * chord / viscosity, loss=values['loss'], dT=dT, dM=dM, power=power, Cp=Cp, Ct=Ct,
+                     converged=converged.all(axis=-1), segment_converged=converged)
+
+##### Blade element class #####
+# The blade element / momentum relations of every element, as functions of the flow angle only
+class _Element:
+
+    ## Defines the attributes of this object
+    def __init__(self, position, chord, twist, tsr, wind_speed, radius, no_blades, coefficients, tip_loss, hub_loss, hub_radius, air_density, viscosity):
+        self.position = position
+        self.chord = chord
+        self.twist = twist
+        self.x = tsr * position                                         # local speed ratio
+        self.r = position * radius
+        self.solidity = no_blades * chord / (2 * np.pi * self.r)
+        self.radius = radius
+        self.no_blades = no_blades
+        self.coefficients = coefficients
+        self.tip_loss = tip_loss
+        self.hub_loss = hub_loss and hub_radius > 0
+        self.hub_radius = hub_radius
+
+        # Reynolds number for the polar lookups, from the relative velocity at a typical induction of 1/3
+        self.re = air_density * wind_speed * np.sqrt((2/3)**2 + self.x**2) * chord / viscosity
+
+    ## Method to give the induction factors and coefficients for the flow angles
+    def values(self, flow):
+        sin_flow = np.sin(flow)
+        cos_flow = np.cos(flow)
+        alpha = flow - self.twist
+        Cl, Cd = self.coefficients(np.rad2deg(alpha), self.re)
+        C_a = Cl * cos_flow + Cd * sin_flow
+        C_m = Cl * sin_flow - Cd * cos_flow
+
+        loss = np.ones(flow.shape)
+        if self.tip_loss:
+            loss = loss * 2 / np.pi * np.arccos(np.exp(-self.no_blades * (self.radius - self.r) / (2 * self.r * np.abs(sin_flow))))
+        if self.hub_loss:
+            loss = loss * 2 / np.pi * np.arccos(np.exp(-self.no_blades * (self.r - self.hub_radius) / (2 * self.hub_radius * np.abs(sin_flow))))
+        loss = np.maximum(loss, 1e-4) # the loss goes to zero right at the tip or hub
+
+        k = self.solidity * C_a / (4 * loss * sin_flow**2)
+        k_ang = self.solidity * C_m / (4 * loss * sin_flow * cos_flow)
+
+        # Momentum region, Buhl's high induction correction past a = 0.4, and the propeller brake region
+        g1 = 2 * loss * k - (10/9 - loss)
+        g2 = np.maximum(2 * loss * k - loss * (4/3 - loss), 0)
+        g3 = 2 * loss * k - (25/9 - 2 * loss)
+        a_buhl = np.where(np.abs(g3) < 1e-6, 1 - 1 / (2 * np.sqrt(g2)), (g1 - np.sqrt(g2)) / g3)
+        a_lin = np.where(flow > 0, np.where(k <= 2/3, k / (1 + k), a_buhl), np.where(k > 1, k / (k - 1), 0))
+        a_ang = k_ang / (1 - k_ang)
+
+        return {'alpha': alpha, 'Cl': Cl, 'Cd': Cd, 'C_a': C_a, 'C_m': C_m, 'loss': loss, 'a_lin': a_lin, 'a_ang': a_ang, 'k_ang': k_ang}
+
+    ## Method to give the residual of the flow angles, zero where blade element and momentum theory agree
+    def residual(self, flow):
+        values = self.values(flow)
+        return np.sin(flow) / (1 - values['a_lin']) - np.cos(flow) * (1 - values['k_ang']) / self.x
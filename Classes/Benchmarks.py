@@ -0,0 +1,171 @@
+##### Import modules #####
+import os
+import gc
+import sys
+import json
+import time
+import glob
+import shutil
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+from copy import copy
+from .Airfoil_Class import Airfoil
+from .Blade_Class import Blade
+from .TSR_Sweep import sweep_tsr
+import Inputs as c
+
+# Version of the result files, compare_results only compares results of the same version
+BENCHMARK_VERSION = 1
+
+## Function to time one workload. It is run until min_time [s] has passed (at least repeat times) after a warm up call,
+## then once more under tracemalloc for its peak memory, which is kept out of the timings
+def measure(function, repeat=3, min_time=0.2):
+    function() # warm up (file caches, airfoil registry)
+
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - start < min_time:
+        gc.collect()
+        t0 = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = float(np.median(times))
+    return {'seconds': median, 'best': float(min(times)), 'runs': len(times),
+            'calls_per_second': 1 / median if median > 0 else np.inf, 'peak_bytes': int(peak)}
+
+## Function to give a workload whose setup (which gives the function to time) is only run on its first call, the warm up
+## call of measure, so running a few workloads does not pay for building the blades of all the others
+def lazy(setup):
+    workload = []
+    def run():
+        if not workload:
+            workload.append(setup())
+        return workload[0]()
+    return run
+
+## Function to make the workloads: name -> function of no arguments, nothing is built until a workload is run. quick
+## leaves out the largest ones
+def workloads(folder, quick=False):
+    foil = Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)
+    work = {}
+
+    def designed(no_segments, fixes=0):
+        blade = Blade(c.radius, no_segments, c.no_blades, foil)
+        blade.design_blade(c.TSR)
+        for _ in range(fixes):
+            blade.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+        return blade
+
+    # The blade chain, at the usual and at fine discretisations
+    for no_segments in ((15, 500) if quick else (15, 500, 5000)):
+        work[f'design_blade[{no_segments}]'] = lambda n=no_segments: designed(n)
+        work[f'fix_blade[{no_segments}]'] = lambda n=no_segments: designed(n, fixes=2)
+        def power_setup(n=no_segments):
+            blade = designed(n, fixes=2)
+            return lambda: blade.calc_power(c.windspeed, c.air_density, verbose=False)
+        work[f'calc_power[{no_segments}]'] = lazy(power_setup)
+
+        # The same chain on Segment objects, as used after prepare_blade
+        def fix_list_setup(n=no_segments):
+            listed = designed(n)
+            segments = [segment.detach() for segment in listed.segments]
+            def fix_list():
+                listed.segments = [copy(segment) for segment in segments]
+                listed.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+            return fix_list
+        work[f'fix_blade_segments[{no_segments}]'] = lazy(fix_list_setup)
+
+    # Single segment methods
+    def segment_setup(method):
+        segment = designed(15).segments[7].detach()
+        if method == 'find_induction':
+            return lambda: segment.find_induction(0.06, c.TSR, c.no_blades, c.radius)
+        return lambda: segment.check_shape(c.Lc_min, c.width, c.height)
+    work['find_induction'] = lazy(lambda: segment_setup('find_induction'))
+    work['check_shape'] = lazy(lambda: segment_setup('check_shape'))
+
+    # Every airfoil with a coordinate file, designed and fixed with the same coefficients
+    for path in sorted(glob.glob('Airfoil_Data/*')):
+        name = os.path.basename(path)
+        shaped = Airfoil(name, c.Cl, c.Cd, c.AoA_opt)
+        def fix_airfoil(shaped=shaped):
+            blade = Blade(c.radius, 500, c.no_blades, shaped)
+            blade.design_blade(c.TSR)
+            blade.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+        work[f'fix_blade[500, {name}]'] = fix_airfoil
+
+    # A full TSR sweep of 350 points, in this process so it measures the work and not the pool
+    tsr_list = np.linspace(2, 9, 350)
+    work['sweep_tsr[350]'] = lambda: sweep_tsr(tsr_list, foil, c.radius, c.no_segments, c.no_blades, c.Lc_min, c.width, c.height, processes=1)
+
+    # Bulk file round trips of prepared blades
+    count = 20 if quick else 100
+    def round_trip_setup(save, load):
+        prepared = designed(c.no_segments, fixes=2)
+        prepared.prepare_blade(c.TSR, c.circ_name, c.Cl_circ, c.Cd_circ, c.AoA_circ, c.L_circ)
+        def round_trip():
+            for i in range(count):
+                getattr(prepared, save)(os.path.join(folder, f'blade_{i}'))
+            for i in range(count):
+                getattr(Blade(), load)(os.path.join(folder, f'blade_{i}'))
+        return round_trip
+    work[f'csv_round_trip[{count}]'] = lazy(lambda: round_trip_setup('save_csv', 'import_blade'))
+    work[f'npz_round_trip[{count}]'] = lazy(lambda: round_trip_setup('save_npz', 'import_npz'))
+
+    return work
+
+## Function to run the workloads (all, or those whose name starts with one of select), giving the results as a dict
+def run_benchmarks(select=None, quick=False, min_time=0.2, verbose=False):
+    folder = tempfile.mkdtemp(prefix='blade_benchmark_')
+    try:
+        results = {}
+        for name, function in workloads(folder, quick).items():
+            if select and not any(name.startswith(prefix) for prefix in select):
+                continue
+            results[name] = measure(function, min_time=min_time)
+            if verbose:
+                print(f"{name:<32} {results[name]['seconds'] * 1000:>10.3f} ms {results[name]['peak_bytes'] / 2**20:>9.2f} MiB")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return {'version': BENCHMARK_VERSION, 'python': sys.version.split()[0], 'numpy': np.__version__,
+            'machine': platform.platform(), 'processor': platform.processor(), 'quick': quick, 'results': results}
+
+## Function to write the results as JSON
+def save_results(results, path):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=1)
+
+## Function to read results written by save_results
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+## Function to compare results against a baseline. Gives name -> (baseline [s], now [s], ratio) for the workloads in both,
+## and the names that are more than tolerance (0.25 = 25%) slower than the baseline
+def compare_results(results, baseline, tolerance=0.25):
+    if results.get('version') != baseline.get('version'):
+        raise ValueError('The baseline was written by a different version of the benchmarks')
+
+    comparison = {}
+    regressions = []
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['seconds']
+        now = result['seconds']
+        comparison[name] = (before, now, now / before if before > 0 else np.inf)
+        if comparison[name][2] > 1 + tolerance:
+            regressions.append(name)
+    return comparison, regressions
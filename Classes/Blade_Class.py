@@ -1,12 +1,19 @@
 ##### Import modules #####
 import numpy as np
+import warnings
 import csv
-import pandas as pd
-import matplotlib.pyplot as plt
-import Inputs as c
-from copy import deepcopy
+from copy import copy
 from .Segment_Class import Segment
+from .Segment_Array_Class import SegmentArray, FIELDS
 from .Airfoil_Class import Airfoil
+from .Constraint_Fit import fit_chord, chord_limits, FREE, MINIMUM, BOX
+from .BEM_Analysis import solve_bem, segment_coefficients
+from .Blade_File import SPAN_ARRAYS, write_blade, open_blade
+from .Span_Refinement import span_edges
+from .Blade_Mesh import blade_sections, loft
+from .Airfoil_Registry import scale_shape
+from .Instrumentation import timed
+from .Config import DEFAULT, Config
 from itertools import zip_longest
 
 ##### Blade Class #####
@@ -14,12 +21,27 @@ from itertools import zip_longest
 class Blade:
 
     ## Defines the attributes of this object
-    def __init__(self, radius=1, no_segments=1, No_Blades=2, airfoil=None):
+    def __init__(self, radius=1, no_segments=1, No_Blades=2, airfoil=None, config=None):
         self.radius = radius
         self.no_segments = no_segments
         self.segments = []
         self.airfoil = airfoil
         self.no_blades = No_Blades
+        self.config = DEFAULT if config is None else config # physical constants and material limits (Config), shared by the segments
+        self.constraints = None # (Lc_min, width, height, tip) refix last fitted every segment to, None if it has not
+
+    ## The segments are stored as arrays after design_blade, and only turned into Segment objects when asked for
+    @property
+    def segments(self):
+        if self._segments is None:
+            self._segments = self.array.views()
+        return self._segments
+
+    ## Giving a new list of segments drops the arrays, as they no longer describe the blade
+    @segments.setter
+    def segments(self, segments):
+        self._segments = segments
+        self.array = None
     
     ## Defines the information that will be shown when this object is printed
     def __str__(self):
@@ -37,42 +59,117 @@ class Blade:
               Min chord [cm]:  {round(chord_min * 100, 1)}
               """
     
-    ## Create the segments for the blade
-    def design_blade(self, TSR):
+    ## Create the segments for the blade, spaced uniformly, or closer together at the root and tip ('cosine') or at the tip ('tip')
+    @timed('Blade.design_blade')
+    def design_blade(self, TSR, spacing='uniform'):
         self.tsr = TSR
 
         if isinstance(self.airfoil, Airfoil):
-            dr = self.radius / self.no_segments
-
-            for i in range(self.no_segments):
-                part = Segment(dr, dr*(i+0.5)/self.radius, airfoil=self.airfoil)
-                part.calc_dimensions(TSR, self.no_blades, self.radius)
-                self.segments.append(part)
+            if spacing == 'uniform':
+                dr = self.radius / self.no_segments
+                array = SegmentArray(dr, dr*(np.arange(self.no_segments)+0.5)/self.radius, airfoil=self.airfoil, config=self.config)
+            else:
+                edges = span_edges(self.no_segments, spacing)
+                array = SegmentArray(self.radius * np.diff(edges), 0.5 * (edges[1:] + edges[:-1]), airfoil=self.airfoil, config=self.config)
+            array.calc_dimensions(TSR, self.no_blades, self.radius)
+            self._segments = None
+            self.array = array
+            self.constraints = None
         
         else:
             raise TypeError('Argument provided is not of the Airfoil class')
     
     ## Method to fix the blade properties to fit within production constraints
+    @timed('Blade.fix_blade')
     def fix_blade(self, Lc_min, width, height, tip):
+        if self.array is not None: # Fit every segment at once, then recalculate only the ones that changed
+            x_coords, y_coords = self.airfoil.shape()
+            chord, bound = fit_chord(self.array.chord, self.array.twist, x_coords, y_coords, Lc_min, width, height, config=self.config)
+            index = np.flatnonzero(bound)
+            self.array.calc_properties(chord[index], self.tsr, self.no_blades, self.radius, tip, index=index)
+            self.array.bound[index] |= bound[index]
+            self.constraints = None # one pass does not leave every segment fitting, so refix has to check them all
+            return
+
         for segment in self.segments: # Check if within production constraints
-            if segment.check_shape(Lc_min, width, height) == False or segment.check_shape(Lc_min, width, height) == 'Other':
+            if segment.check_shape(Lc_min, width, height) != True:
                 segment.calc_properties(segment.iter_chord(Lc_min, width, height), self.tsr, self.no_blades, self.radius, tip)
 
+    ## Method to fix the blade to the constraints until no segment changes, recalculating only the segments they affect.
+    ## The segments are independent, so a segment is only redone if its chord was ever set by a constraint that has changed
+    ## (tip changes all the fixed ones) or it no longer fits, and nothing is checked if the constraints are unchanged.
+    ## Those are restarted from their design values, then fitted and recalculated until no chord changes by more than tol
+    ## [m] (a segment held on the box limit stays bound while its twist creeps), with a RuntimeWarning if max_iter is
+    ## reached first. index gives segments to redo as well, e.g. after changing their coefficients (see
+    ## redesign_segments). Returns the indices of the segments that were redone
+    @timed('Blade.refix')
+    def refix(self, Lc_min, width, height, tip=True, index=None, max_iter=100, tol=1e-9):
+        array = self.array
+        if array is None:
+            raise ValueError('The blade has to be designed (design_blade) before it can be refixed, and not prepared yet')
+        x_coords, y_coords = self.airfoil.shape()
+
+        affected = np.zeros(len(array), dtype=bool)
+        if self.constraints is None:
+            affected[:] = True
+        elif self.constraints != (Lc_min, width, height, tip):
+            old_Lc, old_width, old_height, old_tip = self.constraints
+            affected |= (array.bound & MINIMUM != 0) & (Lc_min != old_Lc or tip != old_tip)
+            affected |= (array.bound & BOX != 0) & (width != old_width or height != old_height or tip != old_tip)
+            chord_min, chord_max = chord_limits(x_coords, y_coords, array.twist, Lc_min, width, height, config=self.config)
+            affected |= (array.chord <= chord_min) | (array.chord >= chord_max)
+        if index is not None:
+            affected[index] = True
+
+        redone = np.flatnonzero(affected)
+        array.calc_dimensions(self.tsr, self.no_blades, self.radius, index=redone)
+        array.bound[redone] = FREE
+
+        active = redone
+        chord_min = max(Lc_min, self.config.t_min / self.config.max_thickness) # as chord_limits
+        for _ in range(max_iter):
+            chord, bound = fit_chord(array.chord[active], array.twist[active], x_coords, y_coords, Lc_min, width, height, config=self.config)
+            bound = np.where(array.chord[active] <= chord_min, bound | MINIMUM, bound) # raised, even if the box then took over
+            array.bound[active] |= bound.astype(np.int8)
+            moved = (bound != FREE) & (np.abs(chord - array.chord[active]) > tol)
+            if not moved.any():
+                break
+            active = active[moved]
+            array.calc_properties(chord[moved], self.tsr, self.no_blades, self.radius, tip, index=active)
+        else:
+            warnings.warn(f'Blade.refix: {len(active)} segment chords still changing after {max_iter} iterations', RuntimeWarning)
+
+        self.constraints = (Lc_min, width, height, tip)
+        return redone
+
+    ## Method to change the coefficients (AoA_opt in radians) of some segments, e.g. a different Re, and redo only those
+    ## segments to the constraints the blade was last fixed to
+    def redesign_segments(self, index, Cl=None, Cd=None, AoA_opt=None):
+        if self.array is None or self.constraints is None:
+            raise ValueError('The blade has to be designed and fixed before segments can be redesigned')
+        for name, value in (('Cl', Cl), ('Cd', Cd), ('AoA_opt', AoA_opt)):
+            if value is not None:
+                getattr(self.array, name)[index] = value
+        return self.refix(*self.constraints, index=index)
+
     ## Method to prepare the design for implementation into ashes (e.g. add cylinder)
+    @timed('Blade.prepare_blade')
     def prepare_blade(self, TSR, circ_name, Cl_circ, Cd_circ, AoA_circ, L_circ):
+        self.segments = list(self.segments) # The segment list changes shape, so stop using the arrays
+
         for segment in self.segments: # Remove any segment less than 30mm from the center
             if segment.position * self.radius <=0.03:
                 self.segments.remove(segment)
 
         # Add the cylinder
         circ_foil = Airfoil(circ_name, Cl_circ, Cd_circ, AoA_circ)
-        cylinder = Segment(0.03, 0.03/self.radius, circ_foil)
+        cylinder = Segment(0.03, 0.03/self.radius, circ_foil, self.config)
         cylinder.calc_dimensions(TSR, self.no_blades, self.radius)
         cylinder.chord = L_circ
         self.segments.insert(0, cylinder)
 
         # Add extra segment to the tip, same properties as before
-        tip_seg = deepcopy(self.segments[-1])
+        tip_seg = copy(self.segments[-1]) # the airfoil is shared, only the values are copied
         tip_seg.position = 1
         tip_seg.length = self.radius * (1-self.segments[-1].position)
         tip_seg.dM = tip_seg.length/self.segments[-1].length * tip_seg.dM # scale the forces to the new area (don't recalculate things)
@@ -80,7 +177,9 @@ class Blade:
         self.segments.insert(len(self.segments), tip_seg)
 
     ## Calculate the Power generation capabilities of the turbine
-    def calc_power(self, wind_speed, air_density):
+    @timed('Blade.calc_power')
+    def calc_power(self, wind_speed=None, air_density=None, verbose=False):
+        air_density, wind_speed, _ = self.config.environment(air_density, wind_speed)
         pos_ratio, _, _, _, _, dT_list, dM_list, _ = np.array(self.read_segments())
         pos_list = pos_ratio * self.radius # unmake the ratio, actual positions
         ang_vel = self.tsr * wind_speed / self.radius # find the angular velocity
@@ -95,7 +194,8 @@ class Blade:
         Ct = T_total / (0.5 * air_density * wind_speed**2 * np.pi * self.radius**2)
 
         # Print results
-        print(f"""
+        if verbose:
+            print(f"""
               ##### Power Characteristics #####
               Available Power [W]:     {round(P_avail,2)}
               Generated Power [W]:     {round(P_gen, 2)}
@@ -104,8 +204,32 @@ class Blade:
               """)
         return P_avail, P_gen, Cp, Ct
     
+    ## Method to analyse the fixed blade geometry off-design, over a grid of TSR x wind speed (result arrays are [TSR, wind, segment])
+    @timed('Blade.analyse')
+    def analyse(self, tsr_list, wind_list=None, air_density=None, tip_loss=True, hub_loss=True, coefficients=None, **options):
+        air_density, wind_list, _ = self.config.environment(air_density, wind_list)
+        pos_list, chord_list, twist_list, _, _, _, _, _ = self.read_segments()
+        if self.array is not None:
+            length_list = self.array.length
+            airfoils = [self.airfoil]
+        else:
+            length_list = [segment.length for segment in self.segments]
+            airfoils = [segment.airfoil for segment in self.segments]
+
+        if coefficients is None: # from the airfoil of each segment
+            coefficients = segment_coefficients(airfoils)
+
+        tsr_grid = np.asarray(tsr_list, dtype=float).reshape(-1, 1, 1)
+        wind_grid = np.asarray(wind_list, dtype=float).reshape(1, -1, 1)
+        return solve_bem(np.asarray(pos_list, dtype=float), np.asarray(chord_list, dtype=float), np.deg2rad(np.asarray(twist_list, dtype=float)),
+                         np.asarray(length_list, dtype=float), self.radius, self.no_blades, tsr_grid, wind_grid, coefficients,
+                         tip_loss, hub_loss, air_density=air_density, config=self.config, **options)
+
     ## Method to import the data from a saved .csv, and therefore recreate the blade
+    @timed('Blade.import_blade')
     def import_blade(self, file_name):
+        import pandas as pd # only loaded when needed, it is slow to import
+
         # Load the CSV file into a DataFrame
         df = pd.read_csv(f'{file_name}.csv')
 
@@ -126,10 +250,13 @@ class Blade:
         self.segments = []
         foil = Airfoil(airfoil, cl, cd, aoa)
         self.tsr = tsr
-        for i in range(no_seg):
-            segment = Segment(radius/no_seg, pos_list[i], foil)
+        self.radius = radius
+        self.no_segments = no_seg
+        self.airfoil = foil
+        for i in range(len(pos_list)): # every row, prepared blades have a tip segment more than no_seg
+            segment = Segment(radius/no_seg, pos_list[i], foil, self.config)
             segment.chord = chord_list[i]
-            segment.twist = twist_list[i]
+            segment.twist = np.deg2rad(twist_list[i]) # the file is in degrees, the classes hold radians
             segment.a_lin = lina_list[i]
             segment.a_ang = anga_list[i]
             segment.dT = dT_list[i]
@@ -139,6 +266,9 @@ class Blade:
 
     ## Method to collect the positional attributes of the blade along it's entire length
     def read_segments(self):
+        if self.array is not None: # Read straight from the arrays when they are still in use
+            return self.array.read_segments()
+
         pos_list    = []
         chord_list  = []
         twist_list  = []
@@ -160,17 +290,115 @@ class Blade:
 
         return pos_list, chord_list, twist_list, lina_list, anga_list, dT_list, dM_list, Re_list
     
-    ## Method to collect the scaled airfoil coordinates for each segment
+    ## Method to give the volume of material in all the blades [m^3]: the area of every section (its airfoil outline, so
+    ## about 0.6 * max_thickness * chord^2 for the design airfoil) times the length of its segment
+    def material_volume(self):
+        _, chord_list, _, _, _, _, _, _ = self.read_segments()
+        if self.array is not None:
+            length_list = self.array.length
+            airfoils = [self.airfoil] * len(chord_list)
+        else:
+            length_list = [segment.length for segment in self.segments]
+            airfoils = [segment.airfoil for segment in self.segments]
+
+        area_list = np.array([foil.geometry().area for foil in airfoils])
+        return float(self.no_blades * np.sum(area_list * np.asarray(chord_list, dtype=float)**2 * np.asarray(length_list, dtype=float)))
+
+    ## Method to collect the scaled airfoil coordinates for each segment, scaling all the segments of an airfoil at once
     def read_airfoils(self):
-        airfoils_list = []
+        _, chord_list, twist_list, _, _, _, _, _ = self.read_segments()
+        chord_list = np.asarray(chord_list, dtype=float)
+        twist_list = np.deg2rad(np.asarray(twist_list, dtype=float))
+        if self.array is not None:
+            airfoils = [self.airfoil] * len(chord_list)
+        else:
+            airfoils = [segment.airfoil for segment in self.segments]
+
+        airfoils_list = [None] * len(airfoils)
+        for name in dict.fromkeys(foil.name for foil in airfoils):
+            index = [i for i, foil in enumerate(airfoils) if foil.name == name]
+            x_coords, y_coords = scale_shape(*airfoils[index[0]].shape(), chord_list[index], twist_list[index])
+            for k, i in enumerate(index):
+                airfoils_list[i] = [x_coords[k], y_coords[k]]
 
-        for segment in self.segments:
-            airfoils_list.append(segment.scaled_shape())
-        
         return airfoils_list
 
+    ## Method to build a closed triangle mesh of the blade (see Blade_Mesh.py): every section resampled onto points
+    ## points, and per_segment - 1 sections interpolated between each pair of segments
+    @timed('Blade.mesh')
+    def mesh(self, points=200, per_segment=1, spacing='uniform', caps=True):
+        return loft(*blade_sections(self, points, spacing), per_segment, caps)
+
+    ## Method to save the blade surface as a binary .stl or .obj file, for manufacturing
+    @timed('Blade.save_mesh')
+    def save_mesh(self, filename, points=200, per_segment=1, spacing='uniform'):
+        self.mesh(points, per_segment, spacing).save(filename)
+
+    ## Method to save the full state of the blade as a binary .npz file (see Blade_File.py), which reads back exactly
+    @timed('Blade.save_npz')
+    def save_npz(self, filename = 'Blade_Data'):
+        airfoils = [self.airfoil]
+        if self.array is not None:
+            spans = {name: getattr(self.array, name) for name in SPAN_ARRAYS}
+            airfoil_index = np.zeros(len(self.array), dtype=np.int64)
+        else:
+            spans = {}
+            for name in SPAN_ARRAYS:
+                if name in ('Cl', 'Cd', 'AoA_opt'):
+                    values = [getattr(segment.airfoil, name) for segment in self.segments]
+                else:
+                    values = [getattr(segment, name, True if name == 'converged' else np.nan) for segment in self.segments]
+                spans[name] = np.real(np.array(values)) # np.roots can leave a zero imaginary part
+            airfoil_index = []
+            for segment in self.segments:
+                if all(segment.airfoil is not foil for foil in airfoils):
+                    airfoils.append(segment.airfoil)
+                airfoil_index.append(next(i for i, foil in enumerate(airfoils) if foil is segment.airfoil))
+
+        inputs = {'TSR': self.tsr, 'radius': self.radius, 'no_segments': self.no_segments, 'no_blades': self.no_blades}
+        airfoil_table = {name: [getattr(foil, name) for foil in airfoils] for name in ('name', 'Cl', 'Cd', 'AoA_opt')}
+        return write_blade(filename, spans, inputs, airfoil_table, airfoil_index, self.config.values())
+
+    ## Method to load a blade saved with save_npz (or converted from a .csv with Blade_File.convert_csv)
+    @timed('Blade.import_npz')
+    def import_npz(self, file_name):
+        members = open_blade(file_name if file_name.endswith('.npz') else f'{file_name}.npz')
+        if int(members['no_blades']) < 1 or not np.isfinite(members['radius']): # converted from a csv that did not give them
+            raise ValueError(f'{file_name} has no blade count or radius, convert its csv again giving them')
+        self.tsr = float(members['TSR'])
+        self.radius = float(members['radius'])
+        self.no_segments = int(members['no_segments'])
+        self.no_blades = int(members['no_blades'])
+        self.constraints = None # not stored, the next refix fits every segment again
+        if 'config' in members: # files written before configs were stored keep the blade's own
+            self.config = Config(**{name: float(members[f'config_{name}']) for name in Config.__slots__})
+
+        airfoils = []
+        for name, Cl, Cd, AoA_opt in zip(members['airfoil_name'], members['airfoil_Cl'], members['airfoil_Cd'], members['airfoil_AoA_opt']):
+            foil = Airfoil(str(name), float(Cl), float(Cd))
+            foil.AoA_opt = float(AoA_opt) # kept in radians, so it is not converted back and forth
+            airfoils.append(foil)
+        self.airfoil = airfoils[0]
+
+        airfoil_index = np.array(members['airfoil_index'])
+        if np.all(airfoil_index == 0): # a single airfoil is held as arrays, as design_blade does
+            array = SegmentArray(np.array(members['length']), np.array(members['position']), self.airfoil, self.config)
+            for name in SPAN_ARRAYS[2:]:
+                setattr(array, name, np.array(members[name]))
+            self._segments = None
+            self.array = array
+        else:
+            values = {name: members[name].tolist() for name in ('length', 'position', 'converged') + FIELDS} # read each array once
+            self.segments = []
+            for i, foil in enumerate(airfoil_index):
+                segment = Segment(values['length'][i], values['position'][i], airfoils[foil], self.config)
+                for name in ('converged',) + FIELDS:
+                    setattr(segment, name, values[name][i])
+                self.segments.append(segment)
+
     ## Method to save the positional data of the blade as a .csv file
-    def save_csv(self, filename = 'Blade_Data'):
+    @timed('Blade.save_csv')
+    def save_csv(self, filename = 'Blade_Data', verbose=False):
         
         pos_list, chord_list, twist_list, lina_list, anga_list, dT_list, dM_list, Re_list = self.read_segments()
         in_name_list = ['TSR [-]', 'Radius [m]', 'No. Segments [-]', 'Airfoil [-]', 'Cl [-]', 'Cd [-]', 'AoA_opt [deg]']
@@ -181,41 +409,14 @@ class Blade:
             writer = csv.writer(file)
             writer.writerow(['r/R', 'Lc [m]', 'Twist [deg]', 'a', 'a\'', 'dT', 'dM', 'Re No.', ' ', 'Inputs'])
             writer.writerows(array)
-        
-        print('Blade design data saved')
 
-    ## Method to graph the blade design in 3D
-    def display(self):
-        pos_list, _, _, _, _, _, _, _ = self.read_segments()
+        if verbose:
+            print('Blade design data saved')
 
-        shapes = self.read_airfoils()
-        x_coords = []
-        y_coords = []
-        z_coords = []
-
-        # Find the maximum length of any entry in shapes
-        max_length = max(len(shape[0]) for shape in shapes)
-        
-        i = -1
-        for shape in shapes:
-            i += 1
-            # Pad the shorter lists in x_coords and y_coords with NaN to match the longest list
-            x_coords.append(np.pad(shape[0], (0, max_length - len(shape[0])), constant_values=np.nan))
-            y_coords.append(np.pad(shape[1], (0, max_length - len(shape[1])), constant_values=np.nan))
-
-            # Append corresponding z_coords for each shape, repeating the z-coordinate to match max_length
-            z_coords.append([pos_list[i] * self.radius] * max_length)
-
-        # Convert lists to numpy arrays and flatten them to 1D
-        x_coords = np.array(x_coords).flatten()
-        y_coords = np.array(y_coords).flatten()
-        z_coords = np.array(z_coords).flatten()
-
-        # Remove any NaN entries to avoid broadcasting errors in the plot
-        mask = ~np.isnan(x_coords) & ~np.isnan(y_coords)
-        x_coords = x_coords[mask]
-        y_coords = y_coords[mask]
-        z_coords = z_coords[mask]
+    ## Method to graph the blade design in 3D (shown, or saved to file_name if one is given)
+    def display(self, file_name=None):
+        mesh = self.mesh(points=100, caps=False)
+        x_coords, y_coords, z_coords = mesh.vertices.T
 
         # Determine the range for each axis using min/max on valid coordinates
         x_min, x_max = np.min(x_coords), np.max(x_coords)
@@ -232,9 +433,10 @@ class Blade:
         all_max += padding
 
         # Graphing
+        import matplotlib.pyplot as plt # only loaded when needed, it is slow to import
         fig = plt.figure()
         ax = fig.add_subplot(111, projection='3d')
-        ax.scatter(x_coords, y_coords, z_coords, c=z_coords, cmap='viridis')  # Use scatter for point clouds
+        ax.plot_trisurf(x_coords, y_coords, mesh.faces, z_coords, cmap='viridis', linewidth=0)
         
         # Set equal scaling for all axes
         ax.set_xlim([all_min, all_max])
@@ -246,4 +448,8 @@ class Blade:
         ax.set_ylabel('Y Label')
         ax.set_zlabel('Z Label')
 
-        plt.show()
+        if file_name is None:
+            plt.show()
+        else: # save the figure instead, e.g. when there is no display
+            fig.savefig(file_name)
+            plt.close(fig)
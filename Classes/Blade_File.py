@@ -0,0 +1,122 @@
+##### Import modules #####
+import os
+import zipfile
+import numpy as np
+from .Segment_Array_Class import FIELDS
+from .Design_Catalog import read_design
+
+# Version of the binary blade files, checked on reading
+FORMAT_VERSION = 2
+
+# Spanwise arrays stored for every segment (twist, flow and AoA in radians, as they are held in the classes)
+SPAN_ARRAYS = ('position', 'length', 'converged', 'Cl', 'Cd', 'AoA_opt') + FIELDS
+
+# Inputs of the blade and their types (TSR is the design TSR, tsr the local one of each segment)
+INPUTS = {'TSR': np.float64, 'radius': np.float64, 'no_segments': np.int64, 'no_blades': np.int64}
+
+## Function to write a blade file (.npz, uncompressed so every member can be memory mapped). spans holds the arrays of
+## SPAN_ARRAYS, inputs the values of INPUTS, and airfoils the name, Cl, Cd, AoA_opt arrays of the airfoils used, with
+## airfoil_index giving the airfoil of every segment. The float arrays are stored as the rows of one 'span' member and
+## the inputs and airfoils as structured arrays, as every member of a small file costs more than its data. config holds
+## the values of the blade's Config, if it is to be stored
+def write_blade(path, spans, inputs, airfoils, airfoil_index, config=None):
+    shape = np.shape(spans['position'])
+    name_length = max([len(name) for name in airfoils['name']] + [1])
+
+    members = {'version': np.array(FORMAT_VERSION, dtype=np.int64)}
+    members['span'] = np.array([np.broadcast_to(spans[name], shape) for name in SPAN_ARRAYS if name != 'converged'], dtype=float).reshape(-1, *shape)
+    members['converged'] = np.ascontiguousarray(np.broadcast_to(spans['converged'], shape), dtype=bool)
+    members['inputs'] = np.array(tuple(inputs[name] for name in INPUTS), dtype=list(INPUTS.items()))
+    members['airfoils'] = np.array(list(zip(airfoils['name'], airfoils['Cl'], airfoils['Cd'], airfoils['AoA_opt'])),
+                                   dtype=[('name', f'U{name_length}'), ('Cl', float), ('Cd', float), ('AoA_opt', float)])
+    members['airfoil_index'] = np.asarray(airfoil_index, dtype=np.int64)
+    if config is not None:
+        members['config'] = np.array(tuple(config.values()), dtype=[(name, float) for name in config])
+
+    if not path.endswith('.npz'):
+        path += '.npz'
+    with open(path + '.tmp', 'wb') as file: # written under a temporary name first, so an interrupted write is never read
+        np.savez(file, **members)
+    os.replace(path + '.tmp', path)
+    return path
+
+## Function to open a blade file without reading it: every array comes back as a read-only view of a memory map of the
+## file, so opening many blades only reads the parts that are then used
+def open_blade(path):
+    members = {}
+    data = np.memmap(path, dtype=np.uint8, mode='r') # one map of the whole file, the members are views of it
+    with open(path, 'rb') as raw, zipfile.ZipFile(raw) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f'{path} is compressed, and can not be memory mapped')
+
+            # The member data starts after its local header, whose extra field can differ from the central directory's
+            raw.seek(info.header_offset)
+            header = raw.read(30)
+            start = info.header_offset + 30 + int.from_bytes(header[26:28], 'little') + int.from_bytes(header[28:30], 'little')
+
+            raw.seek(start)
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw)
+            else:
+                raise ValueError(f'{path} uses .npy format {version}, which can not be memory mapped')
+            offset = raw.tell()
+
+            name = info.filename[:-4] # without .npy
+            if dtype.hasobject:
+                raise ValueError(f'{path} holds Python objects in {name}')
+            members[name] = np.ndarray(shape, dtype=dtype, buffer=data, offset=offset, order='F' if fortran_order else 'C')
+
+    if 'version' not in members or int(members['version']) != FORMAT_VERSION:
+        raise ValueError(f'{path} is not a version {FORMAT_VERSION} blade file')
+
+    # Views of every array by name, e.g. members['chord'], members['TSR'], members['airfoil_name']
+    for i, name in enumerate(name for name in SPAN_ARRAYS if name != 'converged'):
+        members[name] = members['span'][i]
+    inputs = members.pop('inputs')
+    for name in INPUTS:
+        members[name] = inputs[name]
+    airfoils = members.pop('airfoils')
+    for name in airfoils.dtype.names:
+        members[f'airfoil_{name}'] = airfoils[name]
+    if 'config' in members: # e.g. members['config_air_density']
+        config = members['config']
+        for name in config.dtype.names:
+            members[f'config_{name}'] = config[name]
+    return members
+
+## Function to open a whole archive of blade files (e.g. glob('Blade_Designs/*.npz')) as memory maps
+def open_blades(paths):
+    return [open_blade(path) for path in paths]
+
+## Function to convert a blade csv (either layout) to a blade file next to it, or at npz_path. Values the csv does not
+## hold (flow, C_a, C_m, local TSR) are left as NaN, and the segment lengths are taken as radius / no. segments. The
+## blade count and radius are those of the csv, or no_blades and radius when it does not hold them (the layout of
+## Design_Blade.py has no blade count, the older one no radius). A csv that holds neither, without them given, is not converted
+def convert_csv(csv_path, npz_path=None, no_blades=None, radius=None):
+    record, span = read_design(csv_path)
+    position, chord, twist, a_lin, a_ang, dT, dM, re = span.T
+    no_segments = record['no_segments'] if record['no_segments'] is not None else len(position)
+
+    if record['no_blades'] is not None:
+        no_blades = record['no_blades']
+    if record['radius'] is not None and np.isfinite(record['radius']):
+        radius = record['radius']
+    missing = [name for name, value in (('no_blades', no_blades), ('radius', radius)) if value is None]
+    if missing:
+        raise ValueError(f"{csv_path} does not give {' or '.join(missing)}, pass {' and '.join(missing)} to convert_csv")
+    record['radius'] = float(radius)
+
+    spans = {name: np.full(position.shape, np.nan) for name in SPAN_ARRAYS}
+    spans.update(position=position, length=np.full(position.shape, record['radius'] / no_segments), converged=np.ones(position.shape, dtype=bool),
+                 chord=chord, twist=np.deg2rad(twist), a_lin=a_lin, a_ang=a_ang, dT=dT, dM=dM, re=re,
+                 Cl=record['Cl'], Cd=record['Cd'], AoA_opt=np.deg2rad(record['AoA_opt']))
+    inputs = {'TSR': record['TSR'], 'radius': record['radius'], 'no_segments': no_segments, 'no_blades': int(no_blades)}
+    airfoils = {'name': [record['airfoil']], 'Cl': [record['Cl']], 'Cd': [record['Cd']], 'AoA_opt': [np.deg2rad(record['AoA_opt'])]}
+
+    if npz_path is None:
+        npz_path = os.path.splitext(csv_path)[0]
+    return write_blade(npz_path, spans, inputs, airfoils, np.zeros(position.shape, dtype=np.int64))
@@ -0,0 +1,159 @@
+##### Import modules #####
+import os
+import numpy as np
+from .Airfoil_Registry import scale_shape
+
+# Layout of one triangle of a binary STL file
+STL_TRIANGLE = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+## Function to resample a closed outline onto points points, evenly spaced along its length (or, with cosine spacing,
+## closer together at the trailing and leading edges). The points start where the file does and run anticlockwise
+def resample_outline(x_coords, y_coords, points, spacing='uniform'):
+    x_coords = np.asarray(x_coords, dtype=float)
+    y_coords = np.asarray(y_coords, dtype=float)
+    if np.hypot(x_coords[-1] - x_coords[0], y_coords[-1] - y_coords[0]) > 0: # close the outline
+        x_coords = np.append(x_coords, x_coords[0])
+        y_coords = np.append(y_coords, y_coords[0])
+    if np.sum(x_coords[:-1] * y_coords[1:] - x_coords[1:] * y_coords[:-1]) < 0: # clockwise, so the normals would point in
+        x_coords = x_coords[::-1]
+        y_coords = y_coords[::-1]
+
+    length = np.concatenate([[0], np.cumsum(np.hypot(np.diff(x_coords), np.diff(y_coords)))])
+    s = np.arange(points) / points
+    if spacing == 'cosine':
+        s = s - np.sin(4 * np.pi * s) / (4 * np.pi)
+    elif spacing != 'uniform':
+        raise ValueError(f"Unknown spacing {spacing}, use 'uniform' or 'cosine'")
+    t = s * length[-1]
+    return np.interp(t, length, x_coords), np.interp(t, length, y_coords)
+
+## Function to give the sections of a blade as arrays: r [m], chord, twist [rad] and the unit outlines [section, point]
+## of their airfoils, resampled so every section has the same points, in order along the span. Each airfoil is
+## resampled once
+def blade_sections(blade, points=200, spacing='uniform'):
+    pos_list, chord_list, twist_list, _, _, _, _, _ = blade.read_segments()
+    if blade.array is not None:
+        airfoils = [blade.airfoil] * len(pos_list)
+    else:
+        airfoils = [segment.airfoil for segment in blade.segments]
+
+    outlines = {}
+    for foil in airfoils:
+        if foil.name not in outlines:
+            outlines[foil.name] = resample_outline(*foil.shape(), points, spacing)
+    x_unit = np.array([outlines[foil.name][0] for foil in airfoils])
+    y_unit = np.array([outlines[foil.name][1] for foil in airfoils])
+
+    order = np.argsort(np.asarray(pos_list, dtype=float), kind='stable')
+    return (np.asarray(pos_list, dtype=float)[order] * blade.radius, np.asarray(chord_list, dtype=float)[order],
+            np.deg2rad(np.asarray(twist_list, dtype=float))[order], x_unit[order], y_unit[order])
+
+## Function to give the unit normals of triangles from their corners [triangle, corner, xyz]
+def unit_normals(corners):
+    normal = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    size = np.sqrt(np.einsum('ij,ij->i', normal, normal))[:, None]
+    return np.divide(normal, size, out=np.zeros_like(normal), where=size > 0)
+
+##### Blade mesh class #####
+# A closed triangle surface of a blade: the sections lofted together, with the root and tip capped
+class BladeMesh:
+
+    ## Defines the attributes of this object
+    def __init__(self, vertices, faces, sections, points):
+        self.vertices = vertices    # [vertex, xyz] in m, section by section
+        self.faces = faces          # [triangle, 3] vertex indices, anticlockwise seen from outside
+        self.sections = sections
+        self.points = points        # points around every section
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### Blade Mesh #####
+                Sections:    {self.sections}
+                Points:      {self.points}
+                Vertices:    {len(self.vertices)}
+                Triangles:   {len(self.faces)}"""
+
+    ## Method to give the unit normal of the chosen triangles (all by default)
+    def normals(self, index=slice(None)):
+        return unit_normals(self.vertices[self.faces[index]])
+
+    ## Method to write the mesh as a binary STL file, chunk triangles at a time
+    def write_stl(self, path, chunk=2**18):
+        vertices = self.vertices.astype('<f4') # STL holds single precision, so gather and cross in it too
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(b'Blade mesh'.ljust(80, b' '))
+            file.write(np.uint32(len(self.faces)).tobytes())
+            for start in range(0, len(self.faces), chunk):
+                corners = vertices[self.faces[start:start + chunk]]
+                records = np.zeros(len(corners), dtype=STL_TRIANGLE)
+                records['normal'] = unit_normals(corners)
+                records['vertices'] = corners
+                file.write(records.tobytes())
+        os.replace(temp_path, path)
+
+    ## Method to write the mesh as a Wavefront OBJ file, chunk lines at a time (each chunk formatted in one go)
+    def write_obj(self, path, chunk=2**16):
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as file:
+            file.write(f'# Blade mesh, {self.sections} sections of {self.points} points\n')
+            for start in range(0, len(self.vertices), chunk):
+                rows = self.vertices[start:start + chunk]
+                file.write(('v %.7g %.7g %.7g\n' * len(rows)) % tuple(rows.ravel()))
+            for start in range(0, len(self.faces), chunk):
+                rows = self.faces[start:start + chunk] + 1 # OBJ counts from 1
+                file.write(('f %d %d %d\n' * len(rows)) % tuple(rows.ravel().tolist()))
+        os.replace(temp_path, path)
+
+    ## Method to write the mesh to a .stl or .obj file, chosen by its extension
+    def save(self, path):
+        if path.endswith('.stl'):
+            self.write_stl(path)
+        elif path.endswith('.obj'):
+            self.write_obj(path)
+        else:
+            raise ValueError(f'Can not write a mesh to {path}, use a .stl or .obj file')
+
+## Function to loft sections into a mesh. r, chord and twist are per section, the unit outlines [section, point].
+## per_segment - 1 sections are interpolated (chord, twist and outline linearly) between every pair, so the surface
+## follows the blade smoothly. The root and tip are closed with a fan of triangles about their centre
+def loft(r, chord, twist, x_unit, y_unit, per_segment=1, caps=True):
+    r, chord, twist = (np.asarray(value, dtype=float) for value in (r, chord, twist))
+    x_unit = np.asarray(x_unit, dtype=float)
+    y_unit = np.asarray(y_unit, dtype=float)
+
+    if per_segment > 1 and len(r) > 1:
+        # Fractional index of every section, the given ones and those between them
+        u = np.linspace(0, len(r) - 1, (len(r) - 1) * per_segment + 1)
+        k = np.minimum(np.floor(u).astype(int), len(r) - 2)
+        f = (u - k)[:, None]
+        x_unit = (1 - f) * x_unit[k] + f * x_unit[k + 1]
+        y_unit = (1 - f) * y_unit[k] + f * y_unit[k + 1]
+        r, chord, twist = (np.interp(u, np.arange(len(value)), value) for value in (r, chord, twist))
+
+    sections, points = x_unit.shape
+    x_coords, y_coords = scale_shape(x_unit, y_unit, chord, twist)
+    vertices = np.empty((sections, points, 3))
+    vertices[..., 0] = x_coords
+    vertices[..., 1] = y_coords
+    vertices[..., 2] = r[:, None]
+    vertices = vertices.reshape(-1, 3)
+
+    # Two triangles for every quad between neighbouring sections
+    i = np.arange(sections - 1)[:, None] * points
+    j = np.arange(points)[None, :]
+    j_next = (j + 1) % points
+    a, b, c, d = i + j, i + j_next, i + points + j_next, i + points + j
+    faces = np.stack([np.stack([a, b, c], axis=-1), np.stack([a, c, d], axis=-1)], axis=2).reshape(-1, 3)
+
+    if caps:
+        centres = np.stack([vertices[:points].mean(axis=0), vertices[-points:].mean(axis=0)])
+        root, tip = len(vertices), len(vertices) + 1
+        j = np.arange(points)
+        last = (sections - 1) * points
+        root_faces = np.stack([np.full(points, root), (j + 1) % points, j], axis=-1)            # facing down the span
+        tip_faces = np.stack([np.full(points, tip), last + j, last + (j + 1) % points], axis=-1) # facing up the span
+        vertices = np.concatenate([vertices, centres])
+        faces = np.concatenate([faces, root_faces, tip_faces])
+
+    return BladeMesh(vertices, faces, sections, points)
@@ -0,0 +1,303 @@
+##### Import modules #####
+import sys
+import json
+import argparse
+import numpy as np
+from .Airfoil_Class import Airfoil
+from .Polar_Class import Polar
+from .Blade_Class import Blade
+from .Config import Config
+from .TSR_Sweep import sweep_tsr, optimise_tsr
+from .Shape_Optimiser import optimise_shape
+from .Pareto_Optimiser import optimise_pareto
+from .Surrogate_Table import SurrogateTable, build_table
+import Inputs as c
+
+# Names of the inputs a config file can set, with Inputs.py giving the defaults
+SETTINGS = tuple(name for name in vars(c) if not name.startswith('_'))
+
+## Function to read a config file (JSON, any of the names in Inputs.py) over the defaults of Inputs.py
+def load_config(path=None, overrides=()):
+    settings = {name: getattr(c, name) for name in SETTINGS}
+    values = {}
+    if path is not None:
+        with open(path) as file:
+            values.update(json.load(file))
+    for override in overrides: # name=value pairs from --set, the value is read as JSON if it can be
+        name, _, value = override.partition('=')
+        try:
+            values[name] = json.loads(value)
+        except ValueError:
+            values[name] = value
+
+    unknown = set(values) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+    settings.update(values)
+    return settings
+
+## Function to design (and fix) the blade of the settings, with their airfoil design point unless an airfoil is given
+def design_from_settings(settings, fixes=0, spacing='uniform', airfoil=None):
+    foil = Airfoil(settings['foil_name'], settings['Cl'], settings['Cd'], settings['AoA_opt']) if airfoil is None else airfoil
+    blade = Blade(settings['radius'], settings['no_segments'], settings['no_blades'], foil, Config.from_settings(settings))
+    blade.design_blade(settings['TSR'], spacing)
+    for _ in range(fixes):
+        blade.fix_blade(settings['Lc_min'], settings['width'], settings['height'], tip=True)
+    return blade
+
+## Function to load the polar files of an airfoil ({name}_polar.txt or one per Re), None if it has none
+def find_polar(name):
+    try:
+        return Polar.load(name)
+    except FileNotFoundError:
+        return None
+
+## Function to load a blade from a binary (.npz, which holds its own config) or csv file (which holds neither the config
+## nor the blade count, so those of the settings are used)
+def load_blade(path, settings):
+    blade = Blade(No_Blades=settings['no_blades'], config=Config.from_settings(settings))
+    if path.endswith('.csv'):
+        blade.import_blade(path[:-4])
+    else:
+        blade.import_npz(path)
+    return blade
+
+## Function to give the inputs, power and spanwise values of a blade as a dict
+def blade_summary(blade, settings):
+    P_avail, P_gen, Cp, Ct = blade.calc_power(settings['windspeed'], settings['air_density'])
+    names = ('position', 'chord', 'twist', 'a_lin', 'a_ang', 'dT', 'dM', 're')
+    summary = {'TSR': blade.tsr, 'radius': blade.radius, 'no_blades': blade.no_blades, 'no_segments': blade.no_segments,
+               'airfoil': blade.airfoil.name, 'P_avail': P_avail, 'P_gen': P_gen, 'Cp': Cp, 'Ct': Ct}
+    summary.update(zip(names, blade.read_segments()))
+    return summary
+
+## Function to write results to a .json or .npz file, or as JSON to the standard output if path is None
+def write_results(results, path=None):
+    if path is not None and path.endswith('.npz'):
+        np.savez(path, **{name: np.asarray(value) for name, value in results.items()})
+        return
+
+    text = json.dumps(results, default=_to_json, indent=1)
+    if path is None:
+        print(text)
+    else:
+        with open(path, 'w') as file:
+            file.write(text)
+
+## Function to write a blade to a .npz (full state), .csv (as save_csv) or .json (summary) file, or to the standard output
+def write_blade(blade, settings, path=None):
+    if path is not None and path.endswith('.npz'):
+        blade.save_npz(path)
+    elif path is not None and path.endswith('.csv'):
+        blade.save_csv(path[:-4])
+    else:
+        write_results(blade_summary(blade, settings), path)
+
+## Function to turn numpy values into ones json can write
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'{type(value).__name__} can not be written as JSON')
+
+##### Subcommands #####
+def _design(args, settings):
+    blade = design_from_settings(settings, spacing=args.spacing)
+    write_blade(blade, settings, args.output)
+
+def _fix(args, settings):
+    if args.blade is None:
+        blade = design_from_settings(settings, spacing=args.spacing)
+    else:
+        blade = load_blade(args.blade, settings)
+    if args.converge:
+        blade.refix(settings['Lc_min'], settings['width'], settings['height'], tip=True)
+    else:
+        for _ in range(args.fixes):
+            blade.fix_blade(settings['Lc_min'], settings['width'], settings['height'], tip=True)
+    if args.prepare:
+        blade.prepare_blade(blade.tsr, settings['circ_name'], settings['Cl_circ'], settings['Cd_circ'], settings['AoA_circ'], settings['L_circ'])
+    write_blade(blade, settings, args.output)
+
+def _shape(args, settings):
+    # The off-design coefficients come from the polar of the airfoil (optimise_shape refuses to run without one)
+    if args.blade is None:
+        polar = find_polar(settings['foil_name'])
+        foil = None if polar is None else Airfoil.from_polar(settings['foil_name'], polar)
+        blade = design_from_settings(settings, fixes=args.fixes, airfoil=foil)
+    else:
+        blade = load_blade(args.blade, settings)
+        if blade.airfoil.polar is None:
+            blade.airfoil.polar = find_polar(blade.airfoil.name) # the blade keeps the design point it was made with
+    optimised, result = optimise_shape(blade, settings['Lc_min'], settings['width'], settings['height'], settings['windspeed'],
+                                       settings['air_density'], max_iter=args.max_iter)
+    if not result.success:
+        print(f'warning: {result.message}', file=sys.stderr)
+    write_blade(optimised, settings, args.output)
+
+def _pareto(args, settings):
+    if args.output is None:
+        raise ValueError('pareto needs an --output folder for the blades of the front')
+    airfoils = [Airfoil.from_polar(name) for name in [settings['foil_name']] + args.airfoils] # off-design, so from their polars
+    front = optimise_pareto(airfoils, settings['radius'], settings['no_segments'], settings['Lc_min'], settings['width'], settings['height'],
+                            tsr_bounds=args.tsr, chord_bounds=args.chord_scale, twist_bounds=args.twist_scale, blades_list=args.blades,
+                            population=args.population, generations=args.generations, processes=args.processes, seed=args.seed,
+                            wind_speed=settings['windspeed'], air_density=settings['air_density'], config=Config.from_settings(settings))
+    front.save_csv(args.output)
+    print(front)
+
+def _table(args, settings):
+    if args.output is None:
+        raise ValueError('table needs an --output file (.npz)')
+    airfoils = [Airfoil(settings['foil_name'], settings['Cl'], settings['Cd'], settings['AoA_opt'])]
+    airfoils += [Airfoil.from_polar(name) for name in args.airfoils]
+    start, stop, step = args.tsr
+    table = build_table(airfoils, np.arange(start, stop + step / 2, step), np.linspace(*args.width[:2], int(args.width[2])),
+                        np.linspace(*args.height[:2], int(args.height[2])), settings['radius'], settings['no_segments'], settings['no_blades'],
+                        settings['Lc_min'], fixes=args.fixes, config=Config.from_settings(settings), processes=args.processes, checks=args.checks)
+    table.save(args.output)
+    print(table)
+
+def _query(args, settings):
+    table = SurrogateTable.load(args.table)
+    airfoil = settings['foil_name'] if args.airfoil is None else args.airfoil
+    TSR = settings['TSR'] if args.tsr is None else args.tsr
+    width = settings['width'] if args.width is None else args.width
+    height = settings['height'] if args.height is None else args.height
+    Cp, Ct, chord_min = table.query(airfoil, TSR, width, height, args.method)
+    write_results({'airfoil': airfoil, 'TSR': TSR, 'width': width, 'height': height, 'Cp': Cp, 'Ct': Ct, 'chord_min': chord_min,
+                   'error': table.errors.get(args.method)}, args.output)
+
+def _sweep(args, settings):
+    foil = Airfoil(settings['foil_name'], settings['Cl'], settings['Cd'], settings['AoA_opt'])
+    constraints = (foil, settings['radius'], settings['no_segments'], settings['no_blades'], settings['Lc_min'], settings['width'], settings['height'])
+    options = {'wind_speed': settings['windspeed'], 'air_density': settings['air_density'], 'fixes': args.fixes, 'config': Config.from_settings(settings)}
+
+    start, stop, step = args.tsr
+    tsr_list = np.arange(start, stop + step / 2, step)
+    Cp_list, Ct_list, Lc_list = sweep_tsr(tsr_list, *constraints, processes=args.processes, **options)
+    results = {'TSR': tsr_list, 'Cp': Cp_list, 'Ct': Ct_list, 'chord_min': Lc_list}
+    if args.optimise:
+        results['TSR_opt'], results['Cp_opt'], results['Ct_opt'], results['chord_min_opt'] = optimise_tsr((start, stop), *constraints, **options)
+    write_results(results, args.output)
+
+def _analyse(args, settings):
+    if args.blade is None:
+        blade = design_from_settings(settings, fixes=args.fixes)
+    else:
+        blade = load_blade(args.blade, settings)
+
+    start, stop, step = args.tsr
+    tsr_list = np.arange(start, stop + step / 2, step)
+    wind_list = args.wind if args.wind else [settings['windspeed']]
+    result = blade.analyse(tsr_list, wind_list, settings['air_density'])
+    write_results({'TSR': tsr_list, 'wind_speed': np.asarray(wind_list, dtype=float), 'Cp': result.Cp, 'Ct': result.Ct,
+                   'power': result.power, 'converged': result.converged}, args.output)
+
+def _export(args, settings):
+    write_blade(load_blade(args.blade, settings), settings, args.output)
+
+def _mesh(args, settings):
+    if args.output is None:
+        raise ValueError('mesh needs an --output file (.stl or .obj)')
+    load_blade(args.blade, settings).save_mesh(args.output, args.points, args.per_segment, args.spacing)
+
+def _plot(args, settings):
+    load_blade(args.blade, settings).display(args.output)
+
+## Function to build the argument parser
+def parser():
+    main_parser = argparse.ArgumentParser(description='Wind turbine blade design, without a display')
+    main_parser.add_argument('--config', help='JSON file of inputs (names as in Inputs.py), over the defaults of Inputs.py')
+    main_parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE', help='set one input, e.g. --set TSR=5.2')
+    commands = main_parser.add_subparsers(dest='command', required=True)
+
+    def command(name, function, help, output='blade: .npz, .csv or .json (standard output if not given)'):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument('--output', '-o', help=output)
+        sub.set_defaults(function=function)
+        return sub
+
+    sub = command('design', _design, 'design the blade')
+    sub.add_argument('--spacing', default='uniform', choices=('uniform', 'cosine', 'tip'))
+
+    sub = command('fix', _fix, 'fix a blade (designed from the inputs if no --blade) to the production constraints')
+    sub.add_argument('--blade', help='blade file (.npz or .csv) to fix')
+    sub.add_argument('--fixes', type=int, default=2, help='times fix_blade is run')
+    sub.add_argument('--converge', action='store_true', help='fix until no segment changes (refix) in place of --fixes passes')
+    sub.add_argument('--prepare', action='store_true', help='add the cylinder and tip segments')
+    sub.add_argument('--spacing', default='uniform', choices=('uniform', 'cosine', 'tip'))
+
+    sub = command('shape', _shape, 'optimise the chord and twist of a blade for Cp within the production constraints (needs the polar file of the airfoil)')
+    sub.add_argument('--blade', help='blade file (.npz or .csv) to start from, designed and fixed from the inputs if not given')
+    sub.add_argument('--fixes', type=int, default=2)
+    sub.add_argument('--max-iter', type=int, default=500, help='iterations of the optimiser')
+
+    sub = command('pareto', _pareto, 'designs trading Cp against Ct and material volume (multi-objective optimiser)',
+                  output='folder for the blades of the Pareto front (.csv) and a table of them')
+    sub.add_argument('--airfoils', nargs='*', default=[], help='more airfoils to choose from, by name (each needs a polar file, as the airfoil of the inputs does)')
+    sub.add_argument('--tsr', type=float, nargs=2, default=(3, 7), metavar=('MIN', 'MAX'))
+    sub.add_argument('--chord-scale', type=float, nargs=2, default=(0.8, 1.2), metavar=('MIN', 'MAX'))
+    sub.add_argument('--twist-scale', type=float, nargs=2, default=(0.8, 1.2), metavar=('MIN', 'MAX'))
+    sub.add_argument('--blades', type=int, nargs='+', default=[2, 3, 4], help='blade counts to choose from')
+    sub.add_argument('--population', type=int, default=40)
+    sub.add_argument('--generations', type=int, default=25)
+    sub.add_argument('--processes', type=int, default=None, help='processes to use (all cores by default)')
+    sub.add_argument('--seed', type=int, default=None)
+
+    sub = command('table', _table, 'precompute Cp, Ct and minimum chord over TSR x width x height for fast queries',
+                  output='table file (.npz)')
+    sub.add_argument('--airfoils', nargs='*', default=[], help='more airfoils, by name (each needs a polar file)')
+    sub.add_argument('--tsr', type=float, nargs=3, default=(3, 7, 0.05), metavar=('START', 'STOP', 'STEP'))
+    sub.add_argument('--width', type=float, nargs=3, default=(0.06, 0.12, 13), metavar=('MIN', 'MAX', 'POINTS'))
+    sub.add_argument('--height', type=float, nargs=3, default=(0.03, 0.06, 13), metavar=('MIN', 'MAX', 'POINTS'))
+    sub.add_argument('--fixes', type=int, default=2)
+    sub.add_argument('--checks', type=int, default=50, help='random points checked against the exact chain for the error estimates')
+    sub.add_argument('--processes', type=int, default=None, help='processes to use (all cores by default)')
+
+    sub = command('query', _query, 'read Cp, Ct and minimum chord from a table (inputs not given are those of the config)',
+                  output='results: .json (standard output if not given)')
+    sub.add_argument('--table', required=True)
+    sub.add_argument('--airfoil')
+    sub.add_argument('--tsr', type=float)
+    sub.add_argument('--width', type=float)
+    sub.add_argument('--height', type=float)
+    sub.add_argument('--method', default='linear', choices=('linear', 'cubic'))
+
+    sub = command('sweep', _sweep, 'Cp, Ct and minimum chord over a range of TSR', output='results: .json or .npz')
+    sub.add_argument('--tsr', type=float, nargs=3, default=(3, 7, 0.01), metavar=('START', 'STOP', 'STEP'))
+    sub.add_argument('--fixes', type=int, default=2)
+    sub.add_argument('--processes', type=int, default=None, help='processes to use (all cores by default)')
+    sub.add_argument('--optimise', action='store_true', help='also search for the best TSR within the range')
+
+    sub = command('analyse', _analyse, 'off-design Cp and Ct of a blade over TSR and wind speed', output='results: .json or .npz')
+    sub.add_argument('--blade', help='blade file (.npz or .csv), designed and fixed from the inputs if not given')
+    sub.add_argument('--fixes', type=int, default=2)
+    sub.add_argument('--tsr', type=float, nargs=3, default=(0.5, 12, 0.25), metavar=('START', 'STOP', 'STEP'))
+    sub.add_argument('--wind', type=float, nargs='+', help='wind speeds [m/s] (windspeed of the inputs if not given)')
+
+    sub = command('export', _export, 'convert a blade file between .npz, .csv and .json')
+    sub.add_argument('--blade', required=True)
+
+    sub = command('mesh', _mesh, 'write the surface of a blade as a triangle mesh', output='mesh file: .stl (binary) or .obj')
+    sub.add_argument('--blade', required=True)
+    sub.add_argument('--points', type=int, default=200, help='points around every section')
+    sub.add_argument('--per-segment', type=int, default=1, help='sections per segment, the extra ones interpolated')
+    sub.add_argument('--spacing', default='uniform', choices=('uniform', 'cosine'), help='spacing of the points around the sections')
+
+    sub = command('plot', _plot, 'plot a blade in 3D', output='image file (shown on screen if not given)')
+    sub.add_argument('--blade', required=True)
+
+    return main_parser
+
+## Function to run the command line, giving the exit code
+def main(argv=None):
+    args = parser().parse_args(argv)
+    try:
+        settings = load_config(args.config, args.set)
+        args.function(args, settings)
+    except (OSError, ValueError) as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,84 @@
+##### Import modules #####
+import Inputs as c
+
+##### Config class #####
+# The physical constants and material limits a blade is designed with. It can not be changed once made, so one Config
+# can be shared by any number of blades and threads, and it pickles as a tuple of five floats for worker processes
+class Config:
+    __slots__ = ('air_density', 'wind_speed', 'viscosity', 'max_thickness', 't_min')
+
+    ## Defines the attributes of this object (the values of Inputs.py by default)
+    def __init__(self, air_density=c.air_density, wind_speed=c.windspeed, viscosity=c.viscosity, max_thickness=c.max_thickness, t_min=c.t_min):
+        object.__setattr__(self, 'air_density', float(air_density))        # [kg/m^3]
+        object.__setattr__(self, 'wind_speed', float(wind_speed))          # [m/s], the design wind speed
+        object.__setattr__(self, 'viscosity', float(viscosity))            # [kg/ms]
+        object.__setattr__(self, 'max_thickness', float(max_thickness))    # [-], t/c of the airfoil
+        object.__setattr__(self, 't_min', float(t_min))                    # [m], thinnest section that can be made
+
+    ## Creates a config from a dict of settings, with the names used in Inputs.py (e.g. from Command_Line.load_config)
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings['air_density'], settings['windspeed'], settings['viscosity'], settings['max_thickness'], settings['t_min'])
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### Config #####
+                Air density [kg/m^3]:  {format(self.air_density, '.4g')}
+                Wind speed [m/s]:      {format(self.wind_speed, '.4g')}
+                Viscosity [kg/ms]:     {format(self.viscosity, '.4g')}
+                Max thickness [-]:     {format(self.max_thickness, '.3g')}
+                Min thickness [m]:     {format(self.t_min, '.3g')}"""
+
+    def __repr__(self):
+        return f"Config({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+    ## A config can not be changed, replace gives a changed copy instead
+    def __setattr__(self, name, value):
+        raise AttributeError('Config can not be changed, use replace() to make a changed copy')
+
+    def __delattr__(self, name):
+        raise AttributeError('Config can not be changed, use replace() to make a changed copy')
+
+    ## Method to give a copy with some of the values changed, e.g. config.replace(air_density=1.1)
+    def replace(self, **changes):
+        unknown = set(changes) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"Unknown config values: {', '.join(sorted(unknown))}")
+        return Config(**{**self.values(), **changes})
+
+    ## Method to give the air density, wind speed and viscosity, with the ones given (not None) used in place of the config's
+    def environment(self, air_density=None, wind_speed=None, viscosity=None):
+        return (self.air_density if air_density is None else air_density, self.wind_speed if wind_speed is None else wind_speed,
+                self.viscosity if viscosity is None else viscosity)
+
+    ## Method to give the max_thickness and t_min, with the ones given (not None) used in place of the config's
+    def limits(self, max_thickness=None, t_min=None):
+        return (self.max_thickness if max_thickness is None else max_thickness, self.t_min if t_min is None else t_min)
+
+    ## Method to give the values as a dict
+    def values(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    ## Configs with the same values are the same (and can be used as dict keys)
+    def __eq__(self, other):
+        return isinstance(other, Config) and self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    ## Method to give the values as a tuple, in the order of __slots__
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    ## Pickled (and copied) as its values only
+    def __reduce__(self):
+        return (Config, self.astuple())
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+# Config of the values in Inputs.py, used when none is given
+DEFAULT = Config()
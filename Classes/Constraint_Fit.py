@@ -0,0 +1,93 @@
+##### Import modules #####
+import numpy as np
+from .Instrumentation import count
+from .Config import DEFAULT
+
+# Codes for the constraint that sets a segment's chord
+FREE = 0        # fits without any change
+MINIMUM = 1     # raised to the minimum chord length / thickness
+BOX = 2         # reduced to fit the width x height of the stock
+
+## Function to give the half width and half height of unit chord outlines rotated by the twist angles (one per section)
+def rotated_extents(x_coords, y_coords, twist):
+    twist = np.asarray(twist, dtype=float)[..., None]
+    cos_twist = np.cos(twist)
+    sin_twist = np.sin(twist)
+
+    half_width = np.abs(x_coords * cos_twist - y_coords * sin_twist).max(axis=-1)
+    half_height = np.abs(x_coords * sin_twist + y_coords * cos_twist).max(axis=-1)
+    return half_width, half_height
+
+## Function to give the range of chords that meet the constraints. The scaled outline is linear in chord, so the
+## largest chord that fits the box comes straight from the rotated extents. The material limits are those of config
+## (a Config, the default one if None) unless max_thickness or t_min are given
+def chord_limits(x_coords, y_coords, twist, Lc, width, height, max_thickness=None, t_min=None, config=None):
+    max_thickness, t_min = (DEFAULT if config is None else config).limits(max_thickness, t_min)
+    half_width, half_height = rotated_extents(x_coords, y_coords, twist)
+    with np.errstate(divide='ignore'):
+        chord_max = np.minimum(width / (2 * half_width), height / (2 * half_height))
+    chord_min = max(Lc, t_min / max_thickness)
+    return chord_min, chord_max
+
+## Function to move every chord that breaks a constraint onto the edge of the allowed range, all sections at once.
+## The constraints are strict (as in Segment.check_shape), so the result sits a relative margin inside the edge.
+## The material limits are those of config unless given, as in chord_limits
+def fit_chord(chord, twist, x_coords, y_coords, Lc, width, height, max_thickness=None, t_min=None, margin=1e-9, config=None):
+    chord = np.asarray(chord, dtype=float)
+    chord_min, chord_max = chord_limits(x_coords, y_coords, twist, Lc, width, height, max_thickness, t_min, config)
+
+    bound = np.where(chord <= chord_min, MINIMUM, FREE)
+    fitted = np.where(bound == MINIMUM, chord_min * (1 + margin), chord)
+
+    too_big = fitted >= chord_max # if both cannot be met, fitting the stock takes priority
+    bound = np.where(too_big, BOX, bound)
+    fitted = np.where(too_big, chord_max * (1 - margin), fitted)
+
+    count('fit_chord.sections', bound.size)
+    count('fit_chord.minimum', int(np.count_nonzero(bound == MINIMUM)))
+    count('fit_chord.box', int(np.count_nonzero(bound == BOX)))
+    return fitted, bound
+
+## Function to find the twist angles at which the sections fit the box, searching downwards from the current twist.
+## Each section is stepped down until it fits, then the edge is found by bisection to within tol [rad]
+def fit_twist(chord, twist, x_coords, y_coords, width, height, step=np.deg2rad(1), tol=1e-6):
+    chord, twist = np.broadcast_arrays(np.asarray(chord, dtype=float), np.asarray(twist, dtype=float))
+    shape = chord.shape
+    chord = chord.ravel()
+    twist = twist.ravel()
+
+    def fits(index, angle):
+        half_width, half_height = rotated_extents(x_coords, y_coords, angle)
+        return (chord[index] * half_width < width / 2) & (chord[index] * half_height < height / 2)
+
+    fitted = twist.copy()
+    outside = twist.copy()      # last angle that did not fit
+    searching = np.flatnonzero(~fits(np.arange(len(twist)), twist))
+    found = np.zeros(len(twist), dtype=bool)
+
+    # Step down until it fits, giving up after a full turn (the twist is then left as it was)
+    for k in range(1, int(np.ceil(2 * np.pi / step)) + 1):
+        if searching.size == 0:
+            break
+        count('fit_twist.steps', searching.size)
+        angle = twist[searching] - k * step
+        ok = fits(searching, angle)
+        fitted[searching[ok]] = angle[ok]
+        outside[searching[ok]] = angle[ok] + step
+        found[searching[ok]] = True
+        searching = searching[~ok]
+
+    # Bisection between the last angle that did not fit and the first that did
+    index = np.flatnonzero(found)
+    inside = fitted[index]
+    above = outside[index]
+    for _ in range(int(np.ceil(np.log2(step / tol))) + 1):
+        middle = 0.5 * (inside + above)
+        ok = fits(index, middle)
+        inside = np.where(ok, middle, inside)
+        above = np.where(ok, above, middle)
+    fitted[index] = inside
+
+    count('fit_twist.sections', len(twist))
+    count('fit_twist.not_found', searching.size) # left as they were after a full turn
+    return fitted.reshape(shape)
@@ -0,0 +1,178 @@
+##### Import modules #####
+import os
+import glob
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+from .Blade_Class import Blade
+from .Config import DEFAULT
+
+# Version of the cached results, bump it when the calculations change so old entries are no longer used
+CACHE_VERSION = 3
+
+##### Design cache class #####
+# On-disk memo of design_blade, fix_blade and calc_power, keyed on a hash of everything that goes into them
+class DesignCache:
+
+    ## Defines the attributes of this object
+    def __init__(self, folder='.blade_cache', max_bytes=512 * 2**20):
+        self.folder = folder            # where the results are kept
+        self.max_bytes = max_bytes      # least recently used results are removed past this size
+        self.hits = 0
+        self.misses = 0
+        self._size = None               # total size of the folder, found on the first write
+        self._file_hashes = {}          # (path, mtime) -> hash of an airfoil coordinate file
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### Design Cache #####
+                Folder:         {self.folder}
+                Hits:           {self.hits}
+                Misses:         {self.misses}"""
+
+    ## Method to give the designed blade, calculating it only if these inputs have not been seen before
+    def design_blade(self, airfoil, radius, no_segments, no_blades, TSR, config=None):
+        config = DEFAULT if config is None else config
+        key = self.key('design', self.airfoil_key(airfoil), radius, no_segments, no_blades, TSR, *config.astuple())
+        blade = self.get(key)
+        if blade is None:
+            blade = Blade(radius, no_segments, no_blades, airfoil, config)
+            blade.design_blade(TSR)
+            self.put(key, blade)
+        return blade
+
+    ## Method to give a fixed copy of the blade (the blade passed in is not changed)
+    def fix_blade(self, blade, Lc_min, width, height, tip):
+        key = self.key('fix', self.blade_key(blade), Lc_min, width, height, tip, *blade.config.astuple())
+        fixed = self.get(key)
+        if fixed is None:
+            fixed = pickle.loads(pickle.dumps(blade))
+            fixed.fix_blade(Lc_min, width, height, tip)
+            self.put(key, fixed)
+        return fixed
+
+    ## Method to give P_avail, P_gen, Cp, Ct of the blade
+    def calc_power(self, blade, wind_speed=None, air_density=None):
+        air_density, wind_speed, _ = blade.config.environment(air_density, wind_speed)
+        key = self.key('power', self.blade_key(blade), wind_speed, air_density)
+        power = self.get(key)
+        if power is None:
+            power = blade.calc_power(wind_speed, air_density, verbose=False)
+            self.put(key, power)
+        return power
+
+    ## Method to hash the inputs into a key
+    def key(self, *parts):
+        digest = hashlib.sha256(repr(CACHE_VERSION).encode())
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                digest.update(np.ascontiguousarray(part, dtype=float).tobytes())
+            else:
+                digest.update(repr(float(part) if isinstance(part, (int, float, np.number)) and not isinstance(part, bool) else part).encode())
+            digest.update(b'|')
+        return digest.hexdigest()
+
+    ## Method to hash an airfoil, including the content of its coordinate file
+    def airfoil_key(self, airfoil):
+        path = f'Airfoil_Data/{airfoil.name}'
+        mtime = os.stat(path).st_mtime_ns
+        if (path, mtime) not in self._file_hashes:
+            with open(path, 'rb') as file:
+                self._file_hashes[(path, mtime)] = hashlib.sha256(file.read()).hexdigest()
+
+        polar = airfoil.polar
+        polar_parts = () if polar is None else (polar.re, polar.alpha, polar.table)
+        return self.key(airfoil.name, airfoil.Cl, airfoil.Cd, airfoil.AoA_opt, self._file_hashes[(path, mtime)], *polar_parts)
+
+    ## Method to hash the current state of a blade: its spanwise values, the length and airfoil of every segment, and the
+    ## coefficients each segment is designed with and the constraints that have set it (redesign_segments, Reynolds iteration)
+    def blade_key(self, blade):
+        arrays = [np.asarray(values, dtype=float) for values in blade.read_segments()]
+        if blade.array is not None:
+            airfoils = [blade.airfoil]
+            arrays += [blade.array.length, blade.array.Cl, blade.array.Cd, blade.array.AoA_opt, blade.array.bound, blade.array.converged]
+        else:
+            airfoils = list({id(s.airfoil): s.airfoil for s in blade.segments}.values())
+            index = {id(foil): i for i, foil in enumerate(airfoils)}
+            arrays += [np.array([s.length for s in blade.segments], dtype=float), np.array([index[id(s.airfoil)] for s in blade.segments], dtype=float)]
+        constraints = () if blade.constraints is None else blade.constraints
+        return self.key(blade.tsr, blade.radius, blade.no_segments, blade.no_blades, *[self.airfoil_key(foil) for foil in airfoils], *arrays,
+                        'constraints', *constraints, *blade.config.astuple())
+
+    ## Method to load a result, or None if it is not in the cache
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path) # mark as recently used
+        except FileNotFoundError: # evicted by another process since it was read
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    ## Method to save a result, then remove the least recently used ones if the cache is too big
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path)) # a name of its own, as other processes may write the same key
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if self._size is None:
+            self._size = sum(stat.st_size for stat in map(_stat, self._entries()) if stat is not None)
+        else:
+            stat = _stat(path)
+            self._size += 0 if stat is None else stat.st_size
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    ## Method to remove the least recently used results until the cache is within its size limit
+    def evict(self):
+        entries = sorted((stat.st_mtime_ns, stat.st_size, entry) for entry, stat in ((entry, _stat(entry)) for entry in self._entries())
+                         if stat is not None) # skipping those another process removed since they were listed
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    ## Method to remove every result
+    def clear(self):
+        for entry in self._entries():
+            try:
+                os.remove(entry)
+            except FileNotFoundError: # removed by another process
+                pass
+        self._size = 0
+
+    def _path(self, key):
+        return os.path.join(self.folder, key[:2], key + '.pkl')
+
+    def _entries(self):
+        return glob.glob(os.path.join(self.folder, '*', '*.pkl'))
+
+## Function to give the os.stat of a cache entry, None if another process has removed it
+def _stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,210 @@
+##### Import modules #####
+import os
+import re
+import csv
+import glob
+import json
+import numpy as np
+
+# Version of the index files, bump it when what is stored changes so old indexes are rebuilt
+CATALOG_VERSION = 1
+
+# Spanwise columns of a design file, in file order (twist in degrees, as saved)
+SPAN_FIELDS = ('position', 'chord', 'twist', 'a_lin', 'a_ang', 'dT', 'dM', 're')
+
+# Names used in the Inputs column of the design files (both the 'TSR [-]' and the older 'TSR' layouts)
+INPUT_NAMES = {'TSR': 'TSR', 'Radius': 'radius', 'No. Segments': 'no_segments', 'Airfoil': 'airfoil',
+               'Cl': 'Cl', 'Cd': 'Cd', 'AoA_opt': 'AoA_opt'}
+
+# File naming conventions: TSR{TSR*100}_{airfoil}_{Cp*10000}.csv (Design_Blade.py) and the older {blades}B_TSR{TSR}_{airfoil}.csv
+NAME_PATTERN = re.compile(r'^TSR(?P<TSR>\d+)_(?P<airfoil>.+)_(?P<Cp>\d+)$')
+OLD_NAME_PATTERN = re.compile(r'^(?P<no_blades>\d+)B_TSR(?P<TSR>[\d.]+)_(?P<airfoil>.+)$')
+
+##### Design catalog class #####
+# Index of the saved blade designs of a folder. The parameters and summary values of every design are kept in
+# {index_name}.json and the spanwise data of all of them in one {index_name}.npy, so designs can be searched without
+# opening their csv files and the data of many of them loaded at once. Only new or changed files are read again on update
+class DesignCatalog:
+
+    ## Defines the attributes of this object
+    def __init__(self, folder='Blade_Designs', index_name='catalog'):
+        self.folder = folder
+        self.index_path = os.path.join(folder, f'{index_name}.json')
+        self.data_path = os.path.join(folder, f'{index_name}.npy')
+        self.records = []   # one dict per design, sorted by file name
+        self._data = None   # memory map of the spanwise data, opened when first needed
+        self.update()
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        airfoils = sorted({record['airfoil'] for record in self.records})
+        return f"""##### Design Catalog #####
+                Folder:         {self.folder}
+                Designs:        {len(self.records)}
+                Airfoils:       {', '.join(airfoils)}"""
+
+    ## Number of designs held
+    def __len__(self):
+        return len(self.records)
+
+    ## Method to bring the index up to date with the folder, reading only the files that are new or have changed
+    def update(self):
+        old_records, old_data = self._read_index()
+        known = {record['file']: record for record in old_records}
+
+        records = []
+        spans = []
+        changed = old_data is None
+        for path in sorted(glob.glob(os.path.join(self.folder, '*.csv'))):
+            stat = os.stat(path)
+            record = known.pop(os.path.basename(path), None)
+            if record is not None and record['mtime'] == stat.st_mtime_ns and record['size'] == stat.st_size:
+                span = old_data[record['offset']:record['offset'] + record['rows']]
+            else:
+                record, span = read_design(path)
+                record['mtime'] = stat.st_mtime_ns
+                record['size'] = stat.st_size
+                changed = True
+
+            record['offset'] = sum(len(s) for s in spans)
+            records.append(record)
+            spans.append(np.array(span, dtype=float)) # a copy, not a view of the memory map
+        changed = changed or len(known) != 0 # files that were removed
+
+        if changed:
+            # Close the memory maps of the old file first, as a file that is mapped can not be replaced on Windows
+            _close(old_data)
+            _close(self._data)
+            old_data = None
+            self._data = None
+            data = np.concatenate(spans) if spans else np.empty((0, len(SPAN_FIELDS)))
+            self._write_index(records, data)
+            self._data = None
+        else:
+            self._data = old_data
+        self.records = records
+
+    ## Method to find designs by their parameters. Every condition must hold: a value matches exactly, a (low, high) tuple
+    ## is an inclusive range (None leaves that side open) and a function is called with the value.
+    ## e.g. catalog.query(airfoil='S826', Cp=(0.43, None))
+    def query(self, **conditions):
+        def matches(record):
+            for name, condition in conditions.items():
+                value = record.get(name)
+                if callable(condition):
+                    if not condition(value):
+                        return False
+                elif isinstance(condition, tuple):
+                    low, high = condition
+                    if value is None or not np.isfinite(value) or (low is not None and value < low) or (high is not None and value > high):
+                        return False
+                elif value != condition:
+                    return False
+            return True
+
+        return [record for record in self.records if matches(record)]
+
+    ## Method to give a column of parameters (e.g. 'Cp') for the given designs (all by default) as an array
+    def column(self, name, records=None):
+        records = self.records if records is None else records
+        return np.array([record.get(name) for record in records])
+
+    ## Method to load the spanwise data of the given designs (all by default) in one go. Each field comes out as a
+    ## [design, segment] array, padded with NaN for designs with fewer segments; 'rows' gives the segments of each
+    def load(self, records=None, fields=SPAN_FIELDS):
+        records = self.records if records is None else records
+        data = self._span_data()
+        rows = np.array([record['rows'] for record in records], dtype=np.int64)
+        width = int(rows.max()) if len(rows) else 0
+
+        # Row of the stacked data for every [design, segment], reading past the end of a design is masked out
+        offsets = np.array([record['offset'] for record in records], dtype=np.int64)
+        index = offsets[:, None] + np.arange(width)
+        valid = np.arange(width) < rows[:, None]
+        block = data[np.where(valid, index, 0)]
+
+        loaded = {'rows': rows}
+        for name in fields:
+            loaded[name] = np.where(valid, block[..., SPAN_FIELDS.index(name)], np.nan)
+        return loaded
+
+    ## Method to open the spanwise data, kept as a memory map so only the rows asked for are read
+    def _span_data(self):
+        if self._data is None:
+            self._data = np.load(self.data_path, mmap_mode='r')
+        return self._data
+
+    ## Method to read the index files, giving no records if they are missing, unreadable or of another version
+    def _read_index(self):
+        try:
+            with open(self.index_path) as file:
+                index = json.load(file)
+            if index.get('version') != CATALOG_VERSION:
+                return [], None
+            data = np.load(self.data_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return [], None
+        return index['designs'], data
+
+    ## Method to write the index files, under temporary names first so an interrupted write is never read
+    def _write_index(self, records, data):
+        with open(self.data_path + '.tmp', 'wb') as file:
+            np.save(file, data)
+        with open(self.index_path + '.tmp', 'w') as file:
+            json.dump({'version': CATALOG_VERSION, 'designs': records}, file, indent=1)
+        os.replace(self.data_path + '.tmp', self.data_path)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+## Function to close the memory map of an array loaded with mmap_mode (nothing else may still be using it)
+def _close(data):
+    mapping = getattr(data, '_mmap', None)
+    if mapping is not None:
+        mapping.close()
+
+## Function to read one design file, in either layout. Gives its record (parameters and summary values) and its
+## spanwise data as a [segment, field] array
+def read_design(path):
+    span = []
+    inputs = {}
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None) # header
+        for row in reader:
+            if len(row) >= len(SPAN_FIELDS) and row[0].strip():
+                span.append([float(value) for value in row[:len(SPAN_FIELDS)]])
+
+            # The inputs are the name, value pair past the spanwise columns
+            cells = [cell.strip() for cell in row[len(SPAN_FIELDS):] if cell.strip()]
+            if len(cells) == 2:
+                name = cells[0].split(' [')[0]
+                if name in INPUT_NAMES:
+                    inputs[INPUT_NAMES[name]] = cells[1]
+    span = np.array(span, dtype=float).reshape(-1, len(SPAN_FIELDS))
+
+    record = {'file': os.path.basename(path), 'airfoil': None, 'TSR': np.nan, 'Cp': np.nan, 'no_blades': None,
+              'radius': np.nan, 'no_segments': None, 'Cl': np.nan, 'Cd': np.nan, 'AoA_opt': np.nan}
+
+    # Parameters given by the file name, then the ones written in the file, which take precedence
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = NAME_PATTERN.match(stem)
+    if match:
+        record.update(TSR=int(match['TSR']) / 100, airfoil=match['airfoil'], Cp=int(match['Cp']) / 10000)
+    else:
+        match = OLD_NAME_PATTERN.match(stem)
+        if match:
+            record.update(TSR=float(match['TSR']), airfoil=match['airfoil'], no_blades=int(match['no_blades']))
+
+    for name, value in inputs.items():
+        if name == 'airfoil':
+            record[name] = value
+        elif name == 'no_segments':
+            record[name] = int(float(value))
+        else:
+            record[name] = float(value)
+
+    # Summary values of the spanwise data
+    position, chord, twist, _, _, dT, dM, re_list = span.T if len(span) else np.full((len(SPAN_FIELDS), 1), np.nan)
+    record.update(rows=len(span), chord_min=float(np.min(chord)), chord_max=float(np.max(chord)),
+                  twist_root=float(twist[0]), twist_tip=float(twist[-1]), re_min=float(np.min(re_list)),
+                  re_max=float(np.max(re_list)), thrust=float(np.sum(dT)), torque=float(np.dot(dM, position) * record['radius']))
+    return record, span
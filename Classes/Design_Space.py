@@ -0,0 +1,148 @@
+##### Import modules #####
+import os
+import glob
+import json
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .Airfoil_Class import Airfoil
+from .Blade_Class import Blade
+from .Config import DEFAULT
+import Inputs as c
+
+# Inputs that make up the grid, in the order they are varied (the last one fastest)
+PARAMETERS = ('airfoil', 'TSR', 'radius', 'no_blades', 'no_segments', 'Lc_min', 'width', 'height')
+
+# Results written for every design
+RESULTS = ('P_avail', 'P_gen', 'Cp', 'Ct', 'chord_min', 'chord_max', 'converged', 'failed')
+
+## Function to make the grid of designs. airfoils can be Airfoil objects, or names with a polar file to take Cl/Cd/AoA_opt from
+def design_grid(airfoils, tsr_list, radius_list=(c.radius,), blades_list=(c.no_blades,), segments_list=(c.no_segments,),
+                Lc_list=(c.Lc_min,), width_list=(c.width,), height_list=(c.height,)):
+    airfoils = [foil if isinstance(foil, Airfoil) else Airfoil.from_polar(foil) for foil in airfoils]
+    return {'airfoil': airfoils, 'TSR': list(tsr_list), 'radius': list(radius_list), 'no_blades': list(blades_list),
+            'no_segments': list(segments_list), 'Lc_min': list(Lc_list), 'width': list(width_list), 'height': list(height_list)}
+
+## Function to give the number of designs in a grid
+def grid_size(grid):
+    return int(np.prod([len(grid[name]) for name in PARAMETERS]))
+
+## Function to give the inputs of the designs with the given numbers (position in the grid, last parameter varying fastest)
+def grid_cases(grid, case_ids):
+    shape = [len(grid[name]) for name in PARAMETERS]
+    index = np.unravel_index(np.asarray(case_ids, dtype=np.int64), shape)
+
+    cases = []
+    for n, case_id in enumerate(case_ids):
+        case = {'case_id': int(case_id)}
+        for name, i in zip(PARAMETERS, index):
+            case[name] = grid[name][i[n]]
+        cases.append(case)
+    return cases
+
+## Function to run the full design -> fix -> prepare -> calc_power chain of one design, with the physical constants and
+## material limits of config (wind_speed and air_density, if given, are used for calc_power only)
+def evaluate_design(case, wind_speed=None, air_density=None, fixes=2, prepare=True, config=None):
+    row = {name: np.nan for name in RESULTS}
+    row['failed'] = True
+    try:
+        blade = Blade(case['radius'], case['no_segments'], case['no_blades'], case['airfoil'], config)
+        blade.design_blade(case['TSR'])
+        for _ in range(fixes):
+            blade.fix_blade(case['Lc_min'], case['width'], case['height'], tip=True)
+        converged = bool(np.all(blade.array.converged))
+        if prepare:
+            blade.prepare_blade(case['TSR'], c.circ_name, c.Cl_circ, c.Cd_circ, c.AoA_circ, c.L_circ)
+
+        row['P_avail'], row['P_gen'], row['Cp'], row['Ct'] = blade.calc_power(wind_speed, air_density, verbose=False)
+        _, chord_list, _, _, _, _, _, _ = blade.read_segments()
+        row['chord_min'] = min(chord_list)
+        row['chord_max'] = max(chord_list)
+        row['converged'] = converged
+        row['failed'] = False
+    except (ValueError, ArithmeticError, TypeError, IndexError): # a failed design is recorded, not allowed to stop the run
+        pass
+    return row
+
+## Function to evaluate every design of a grid over a pool of processes, writing the results to output_dir in column shards
+## (part-*.npz) after every batch. Rerunning with the same grid picks up from the last shard written
+def run_design_space(grid, output_dir, processes=None, batch_size=1000, **options):
+    os.makedirs(output_dir, exist_ok=True)
+    _check_grid(grid, output_dir, options)
+
+    done = set(load_results(output_dir, columns=('case_id',)).get('case_id', np.array([], dtype=np.int64)).tolist())
+    todo = [case_id for case_id in range(grid_size(grid)) if case_id not in done]
+    part = 1 + max((int(os.path.basename(path)[5:10]) for path in glob.glob(os.path.join(output_dir, 'part-*.npz'))), default=-1)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        for start in range(0, len(todo), batch_size):
+            cases = grid_cases(grid, todo[start:start + batch_size])
+            if pool is None:
+                rows = [evaluate_design(case, **options) for case in cases]
+            else:
+                rows = list(pool.map(_evaluate_case, [(case, options) for case in cases], chunksize=max(1, len(cases) // (4 * processes))))
+            _write_part(output_dir, part, cases, rows)
+            part += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return load_results(output_dir)
+
+## Function to load the results written by run_design_space as one array per column, sorted by case number
+def load_results(output_dir, columns=None):
+    parts = sorted(glob.glob(os.path.join(output_dir, 'part-*.npz')))
+    if not parts:
+        return {}
+
+    data = {}
+    for path in parts:
+        with np.load(path) as part:
+            for name in (part.files if columns is None else columns):
+                data.setdefault(name, []).append(part[name])
+
+    data = {name: np.concatenate(values) for name, values in data.items()}
+    if 'case_id' in data:
+        order = np.argsort(data['case_id'], kind='stable')
+        data = {name: values[order] for name, values in data.items()}
+    return data
+
+## Function for the pool, which can only pass one argument
+def _evaluate_case(arguments):
+    case, options = arguments
+    return evaluate_design(case, **options)
+
+## Function to write one shard of results. It is written under a temporary name first, so an interrupted write is never read
+def _write_part(output_dir, part, cases, rows):
+    columns = {'case_id': np.array([case['case_id'] for case in cases], dtype=np.int64),
+               'airfoil': np.array([case['airfoil'].name for case in cases])}
+    for name in PARAMETERS[1:]:
+        columns[name] = np.array([case[name] for case in cases])
+    for name in RESULTS:
+        columns[name] = np.array([row[name] for row in rows])
+
+    path = os.path.join(output_dir, f'part-{part:05d}.npz')
+    with open(path + '.tmp', 'wb') as file:
+        np.savez(file, **columns)
+    os.replace(path + '.tmp', path)
+
+## Function to make sure a run is only resumed with the grid and the options of evaluate_design it was started with
+## (the config, and the wind speed and air density it gives when they are not given, included)
+def _check_grid(grid, output_dir, options):
+    description = {name: [foil.name for foil in grid[name]] if name == 'airfoil' else [float(value) for value in grid[name]] for name in PARAMETERS}
+    description['airfoil_coefficients'] = [[float(foil.Cl), float(foil.Cd), float(foil.AoA_opt)] for foil in grid['airfoil']]
+    config = options.get('config') or DEFAULT
+    air_density, wind_speed, _ = config.environment(options.get('air_density'), options.get('wind_speed'))
+    description['options'] = {'config': list(config.astuple()), 'wind_speed': float(wind_speed), 'air_density': float(air_density),
+                              'fixes': int(options.get('fixes', 2)), 'prepare': bool(options.get('prepare', True))}
+    path = os.path.join(output_dir, 'grid.json')
+
+    if os.path.exists(path):
+        with open(path) as file:
+            if json.load(file) != description:
+                raise ValueError(f'{output_dir} holds the results of a different grid or different options (config, wind_speed, air_density, fixes, prepare)')
+    else:
+        with open(path, 'w') as file:
+            json.dump(description, file, indent=1)
@@ -0,0 +1,128 @@
+##### Import modules #####
+import os
+import numpy as np
+from itertools import islice
+
+##### Power curve class #####
+# Power of a turbine against wind speed, precomputed once from the blade's Cp(TSR) so it can be looked up for any wind series
+class PowerCurve:
+
+    ## Defines the attributes of this object
+    def __init__(self, wind_speed, power, tsr=None, Cp=None):
+        self.wind_speed = np.asarray(wind_speed, dtype=float)  # [m/s], increasing
+        self.power = np.asarray(power, dtype=float)            # [W]
+        self.rated_power = float(self.power.max())             # [W]
+        self.tsr = tsr                                          # Cp(TSR) lookup it was made from
+        self.Cp = Cp
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### Power Curve #####
+                Rated power [W]:     {round(self.rated_power, 2)}
+                Wind speeds [m/s]:   {format(self.wind_speed[0], '.3g')} to {format(self.wind_speed[-1], '.3g')}"""
+
+    ## Creates the power curve of a blade run at a fixed TSR (the one with the best Cp by default), between the cut in and
+    ## cut out speeds and limited to the rated power if one is given
+    @classmethod
+    def from_blade(cls, blade, tsr=None, wind_list=np.arange(0, 30.05, 0.1), cut_in=3, cut_out=25, rated_power=None, efficiency=1,
+                   tsr_list=np.arange(0.5, 15.01, 0.05), reference_wind=None, air_density=None, **options):
+        air_density, reference_wind, _ = blade.config.environment(air_density, reference_wind)
+        result = blade.analyse(tsr_list, [reference_wind], air_density, **options)
+        Cp_list = np.where(result.converged[:, 0], result.Cp[:, 0], np.nan)
+
+        if tsr is None:
+            tsr = tsr_list[np.nanargmax(Cp_list)]
+        Cp = np.interp(tsr, tsr_list, np.nan_to_num(Cp_list))
+
+        wind_list = np.asarray(wind_list, dtype=float)
+        power = efficiency * Cp * 0.5 * air_density * wind_list**3 * np.pi * blade.radius**2
+        if rated_power is not None:
+            power = np.minimum(power, rated_power)
+        power = np.where((wind_list >= cut_in) & (wind_list <= cut_out), np.maximum(power, 0), 0)
+
+        return cls(wind_list, power, tsr_list, Cp_list)
+
+    ## Method to give the power [W] at an array of wind speeds (zero outside the curve)
+    def __call__(self, wind_speed):
+        return np.interp(wind_speed, self.wind_speed, self.power, left=0, right=0)
+
+##### Energy yield class #####
+# The totals collected over a wind series
+class EnergyYield:
+
+    ## Defines the attributes of this object
+    def __init__(self, energy, samples, missing, time_step, rated_power, bins, wind_counts, bin_energy):
+        self.energy = energy                        # [J]
+        self.samples = samples                      # number of valid wind speeds
+        self.missing = missing                      # number of NaN wind speeds skipped
+        self.time_step = time_step                  # [s] between samples
+        self.hours = samples * time_step / 3600     # [h] of valid data
+        self.mean_power = energy / (samples * time_step) if samples else np.nan # [W]
+        self.capacity_factor = self.mean_power / rated_power if rated_power > 0 else np.nan
+        self.bins = bins                            # [m/s], edges of the wind speed bins
+        self.wind_counts = wind_counts              # samples in each bin
+        self.bin_energy = bin_energy                # [J] produced in each bin
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### Energy Yield #####
+                Hours of data [h]:     {round(self.hours, 1)}
+                Missing samples [-]:   {self.missing}
+                Energy [kWh]:          {round(self.energy / 3.6e6, 3)}
+                Mean power [W]:        {round(self.mean_power, 2)}
+                Capacity factor [%]:   {round(self.capacity_factor * 100, 2)}"""
+
+## Function to read the wind speeds of a csv/text file in chunks (column is the index of the wind speed column)
+def read_wind_csv(path, column=0, chunk_size=1_000_000, skip_header=1, delimiter=','):
+    with open(path) as file:
+        for _ in range(skip_header):
+            next(file, None)
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                break
+            yield np.loadtxt(lines, delimiter=delimiter, usecols=column, ndmin=1)
+
+## Function to read the wind speeds of a raw binary (or .npy) file in chunks, through a memory map
+def read_wind_binary(path, dtype='<f4', chunk_size=1_000_000, offset=0):
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r').ravel()
+    else:
+        data = np.memmap(path, dtype=dtype, mode='r', offset=offset)
+
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+## Function to pick the reader from the file extension (.csv/.txt as text, anything else as binary)
+def stream_wind(path, chunk_size=1_000_000, **options):
+    if os.path.splitext(path)[1].lower() in ('.csv', '.txt'):
+        return read_wind_csv(path, chunk_size=chunk_size, **options)
+    return read_wind_binary(path, chunk_size=chunk_size, **options)
+
+## Function to collect the energy, capacity factor and wind/energy histograms over chunks of wind speeds [m/s],
+## one sample every time_step [s]. Only one chunk is held at a time, so the memory used does not grow with the series
+def energy_yield(power_curve, chunks, time_step=1, bins=np.arange(0, 31, 1)):
+    bins = np.asarray(bins, dtype=float)
+    wind_counts = np.zeros(len(bins) - 1, dtype=np.int64)
+    bin_energy = np.zeros(len(bins) - 1)
+    energy = 0.0
+    samples = 0
+    missing = 0
+
+    for chunk in chunks:
+        wind = np.asarray(chunk, dtype=float)
+        valid = np.isfinite(wind)
+        missing += int(wind.size - np.count_nonzero(valid))
+        wind = wind[valid]
+
+        power = power_curve(wind)
+        energy += float(power.sum()) * time_step
+        samples += wind.size
+
+        # Bin index of each sample, anything outside the edges is left out of the histograms
+        index = np.searchsorted(bins, wind, side='right') - 1
+        inside = (index >= 0) & (index < len(bins) - 1)
+        wind_counts += np.bincount(index[inside], minlength=len(bins) - 1)
+        bin_energy += np.bincount(index[inside], weights=power[inside], minlength=len(bins) - 1) * time_step
+
+    return EnergyYield(energy, samples, missing, time_step, power_curve.rated_power, bins, wind_counts, bin_energy)
@@ -0,0 +1,93 @@
+##### Import modules #####
+import numpy as np
+from .Instrumentation import count, convergence
+
+## Function to give the momentum balance of a segment and its derivative with respect to the linear induction factor
+def induction_residual(a, chord, position, TSR, No_Blades, Radius, Cl, Cd):
+    # The balance of Segment.find_induction, B * W^2 * C_a * c * dr - 4 * pi * r * V^2 * a * (1-a) * dr with
+    # W = V * (1-a) / sin(flow), divided through by V^2 * dr (the root does not change):
+    # B * c * (1-a)^2 * C_a / sin^2(flow) - 4 * pi * r * a * (1-a)
+    tsr = TSR * position
+    g = (1 - a) * (4*a - 1) / (a * tsr) # tan(flow), as 1 + a' = a / (4a - 1)
+    flow = np.arctan(g)
+    sin_flow = np.sin(flow)
+    cos_flow = np.cos(flow)
+
+    C_a = Cl * cos_flow + Cd * sin_flow
+    h = (1 - a)**2 * C_a / sin_flow**2
+    f = No_Blades * chord * h - 4 * np.pi * position * Radius * a * (1 - a)
+
+    # Analytic derivative, d(flow)/da = g' / (1 + g^2) with g' = (1/a^2 - 4) / tsr
+    dflow = (1 / a**2 - 4) / tsr / (1 + g**2)
+    dC_a = (Cd * cos_flow - Cl * sin_flow) * dflow
+    dh = -2 * (1 - a) * C_a / sin_flow**2 + (1 - a)**2 * (dC_a / sin_flow**2 - 2 * C_a * cos_flow * dflow / sin_flow**3)
+    df = No_Blades * chord * dh - 4 * np.pi * position * Radius * (1 - 2*a)
+
+    return f, df
+
+## Function to solve the linear induction factor of many segments at once, given their chord lengths
+def solve_induction(chord, position, TSR, No_Blades, Radius, Cl, Cd, a0=1/3, tol=1e-10, max_iter=100, bracket_points=200):
+    # All the inputs broadcast together, each element is solved independently
+    chord, position, TSR, Cl, Cd = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (chord, position, TSR, Cl, Cd)))
+    shape = chord.shape
+    chord, position, TSR, Cl, Cd = (x.ravel() for x in (chord, position, TSR, Cl, Cd))
+
+    a_lin = np.full(chord.shape, float(a0))
+    converged = np.zeros(chord.shape, dtype=bool)
+    active = np.ones(chord.shape, dtype=bool)
+
+    # Newton method, only stepping the elements which have not converged yet
+    steps = 0
+    with np.errstate(all='ignore'):
+        for _ in range(max_iter):
+            idx = np.flatnonzero(active)
+            if idx.size == 0:
+                break
+            steps += idx.size
+
+            f, df = induction_residual(a_lin[idx], chord[idx], position[idx], TSR[idx], No_Blades, Radius, Cl[idx], Cd[idx])
+            a_new = a_lin[idx] - f / df
+
+            # Leaving 1/4 < a < 1 (or a NaN step) means Newton has failed, leave it to the bracketed search
+            lost = ~np.isfinite(a_new) | (a_new <= 0.25) | (a_new >= 1)
+            done = ~lost & (np.abs(a_new - a_lin[idx]) < tol)
+
+            a_lin[idx[~lost]] = a_new[~lost]
+            converged[idx[done]] = True
+            active[idx[lost | done]] = False
+
+        # Bracketed fallback (bisection) for every element Newton could not solve
+        idx = np.flatnonzero(~converged)
+        if idx.size:
+            a_lin[idx], converged[idx] = _bisect_induction(chord[idx], position[idx], TSR[idx], No_Blades, Radius, Cl[idx], Cd[idx], tol, bracket_points)
+
+    count('induction.newton_steps', steps)
+    count('induction.bisections', idx.size)
+    convergence('induction', converged, steps, position)
+    a_lin[~converged] = np.nan
+    return a_lin.reshape(shape), converged.reshape(shape)
+
+## Function to find the root by bisection, from the first sign change on a grid over 1/4 < a < 1
+def _bisect_induction(chord, position, TSR, No_Blades, Radius, Cl, Cd, tol, bracket_points):
+    grid = np.linspace(0.25, 1, bracket_points + 2)[1:-1]
+    f, _ = induction_residual(grid, chord[:, None], position[:, None], TSR[:, None], No_Blades, Radius, Cl[:, None], Cd[:, None])
+
+    change = np.signbit(f[:, :-1]) != np.signbit(f[:, 1:])
+    change &= np.isfinite(f[:, :-1]) & np.isfinite(f[:, 1:])
+    found = change.any(axis=1)
+    first = np.argmax(change, axis=1)
+
+    rows = np.arange(len(chord))
+    lower = grid[first]
+    upper = grid[np.minimum(first + 1, len(grid) - 1)]
+    f_lower = f[rows, first]
+
+    for _ in range(int(np.ceil(np.log2((grid[1] - grid[0]) / tol))) + 1):
+        middle = 0.5 * (lower + upper)
+        f_middle, _ = induction_residual(middle, chord, position, TSR, No_Blades, Radius, Cl, Cd)
+        same = np.signbit(f_middle) == np.signbit(f_lower)
+        lower = np.where(same, middle, lower)
+        f_lower = np.where(same, f_middle, f_lower)
+        upper = np.where(same, upper, middle)
+
+    return 0.5 * (lower + upper), found
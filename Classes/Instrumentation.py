@@ -0,0 +1,119 @@
+##### Import modules #####
+import time
+import threading
+from contextvars import ContextVar
+from functools import wraps
+from contextlib import contextmanager
+import numpy as np
+
+# The Instrumentation collecting at the moment in this thread (or asyncio task), None when instrumentation is off
+# (every hook then returns straight away). Threads start with it off, so each only records into its own
+_active = ContextVar('instrumentation', default=None)
+
+# Positions of failed elements kept per stage, so a long run does not keep growing the report
+MAX_FAILURES = 1000
+
+##### Instrumentation class #####
+# Counters, per-stage timers and convergence statistics of one instrumented run. Only the calls made in this process
+# and thread are collected, so sweeps should be run with processes=1 while instrumented
+class Instrumentation:
+
+    ## Defines the attributes of this object
+    def __init__(self, callback=None):
+        self.callback = callback    # called as callback(kind, name, value) on every event, kind is 'count', 'time' or 'convergence'
+        self.counters = {}          # name -> count
+        self.timers = {}            # name -> [calls, seconds], the time of a stage includes the stages it calls
+        self.convergence = {}       # name -> [elements, converged, iterations, positions of failed elements]
+        self._lock = threading.Lock()
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        lines = ['##### Instrumentation #####']
+        for name, (calls, seconds) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f'                {name:<32} {calls:>9} calls {seconds * 1000:>12.3f} ms')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'                {name:<32} {value:>9}')
+        for name, (elements, converged, iterations, _) in sorted(self.convergence.items()):
+            lines.append(f'                {name:<32} {converged:>9} of {elements} converged, {iterations} iterations')
+        return '\n'.join(lines)
+
+    ## Method to add to a counter
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        if self.callback is not None:
+            self.callback('count', name, n)
+
+    ## Method to add the time of one call of a stage
+    def add_time(self, name, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(name, [0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+        if self.callback is not None:
+            self.callback('time', name, seconds)
+
+    ## Method to add the convergence of a batch of elements (and where the failed ones are, e.g. their r/R)
+    def add_convergence(self, name, converged, iterations=0, position=None):
+        converged = np.asarray(converged, dtype=bool)
+        with self._lock:
+            stats = self.convergence.setdefault(name, [0, 0, 0, []])
+            stats[0] += converged.size
+            stats[1] += int(np.count_nonzero(converged))
+            stats[2] += int(iterations)
+            if position is not None and len(stats[3]) < MAX_FAILURES:
+                failed = np.broadcast_to(np.asarray(position, dtype=float), converged.shape)[~converged]
+                stats[3].extend(failed[:MAX_FAILURES - len(stats[3])].tolist())
+        if self.callback is not None:
+            self.callback('convergence', name, {'elements': converged.size, 'converged': int(np.count_nonzero(converged)), 'iterations': int(iterations)})
+
+    ## Method to give everything collected as a dict (ready for json)
+    def report(self):
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'timers': {name: {'calls': calls, 'seconds': seconds, 'mean': seconds / calls} for name, (calls, seconds) in self.timers.items()},
+                    'convergence': {name: {'elements': elements, 'converged': converged, 'failed': elements - converged,
+                                           'rate': converged / elements if elements else np.nan, 'iterations': iterations,
+                                           'failed_positions': list(failed)}
+                                    for name, (elements, converged, iterations, failed) in self.convergence.items()}}
+
+## Function to switch instrumentation on for a block of code, e.g.
+##     with instrument() as stats:
+##         sweep_tsr(tsr_list, ..., processes=1)
+##     print(stats)
+@contextmanager
+def instrument(callback=None):
+    stats = Instrumentation(callback)
+    token = _active.set(stats)
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+## Function to add to a counter, if instrumentation is on
+def count(name, n=1):
+    active = _active.get()
+    if active is not None:
+        active.count(name, n)
+
+## Function to add convergence statistics, if instrumentation is on
+def convergence(name, converged, iterations=0, position=None):
+    active = _active.get()
+    if active is not None:
+        active.add_convergence(name, converged, iterations, position)
+
+## Decorator to time every call of a function as a stage, if instrumentation is on
+def timed(name):
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            active = _active.get()
+            if active is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                active.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,227 @@
+##### Import modules #####
+import os
+import csv
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from .Blade_Class import Blade
+from .BEM_Analysis import solve_bem, airfoil_coefficients
+from .Constraint_Fit import fit_chord
+from .Shape_Optimiser import solved_blade
+import Inputs as c
+
+# Design variables, in the order of a candidate's values, and the objectives (Cp is maximised, Ct and volume minimised)
+VARIABLES = ('TSR', 'airfoil', 'chord_scale', 'twist_scale', 'no_blades')
+OBJECTIVES = ('Cp', 'Ct', 'volume')
+
+##### Pareto front class #####
+# The designs of the last generation that no other design beats in every objective, with their blades
+class ParetoFront:
+
+    ## Defines the attributes of this object
+    def __init__(self, variables, objectives, blades, generations, evaluations):
+        self.variables = variables      # [design, variable] values, as VARIABLES (airfoil is its number in the list given)
+        self.objectives = objectives    # [design, objective] values, as OBJECTIVES
+        self.blades = blades            # blade of every design, holding its BEM solution
+        self.generations = generations
+        self.evaluations = evaluations  # designs evaluated, each different design only once
+
+    ## Number of designs on the front
+    def __len__(self):
+        return len(self.blades)
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        Cp, Ct, volume = self.objectives.T
+        return f"""##### Pareto Front #####
+                Designs:                 {len(self)}
+                Generations:             {self.generations}
+                Evaluations:             {self.evaluations}
+                Power Coefficient [%]:   {round(Cp.min() * 100, 2)} to {round(Cp.max() * 100, 2)}
+                Thrust Coefficient [%]:  {round(Ct.min() * 100, 2)} to {round(Ct.max() * 100, 2)}
+                Volume [cm^3]:           {round(volume.min() * 1e6, 1)} to {round(volume.max() * 1e6, 1)}"""
+
+    ## Method to save every blade of the front (as Blade.save_csv, {prefix}_000.csv and on) to a folder, with a table of
+    ## their variables and objectives ({prefix}_front.csv), in order of Cp
+    def save_csv(self, folder='Pareto_Front', prefix='Pareto'):
+        os.makedirs(folder, exist_ok=True)
+        order = np.argsort(-self.objectives[:, 0], kind='stable')
+        for k, i in enumerate(order):
+            self.blades[i].save_csv(os.path.join(folder, f'{prefix}_{k:03d}'))
+
+        with open(os.path.join(folder, f'{prefix}_front.csv'), mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Blade', 'TSR [-]', 'Airfoil [-]', 'Chord scale [-]', 'Twist scale [-]', 'No. Blades [-]', 'Cp [-]', 'Ct [-]', 'Volume [m^3]'])
+            for k, i in enumerate(order):
+                TSR, _, chord_scale, twist_scale, no_blades = self.variables[i]
+                writer.writerow([f'{prefix}_{k:03d}', TSR, self.blades[i].airfoil.name, chord_scale, twist_scale, int(no_blades), *self.objectives[i]])
+
+## Function to make the blade of one design: designed at its TSR with its airfoil and blade count, fixed to the
+## production constraints (refix), then its chord and twist scaled and the chord fitted to the constraints again at the
+## new twist. The blade holds the BEM solution of that shape at the wind speed and air density (the config's unless given).
+## The scaled sections run off their design angle of attack, so each airfoil needs a polar (Airfoil.from_polar) or its
+## Cl, Cd(alpha, re) function in coefficients (a list like airfoils, None for those read from their polar)
+def candidate_blade(variables, airfoils, radius, no_segments, Lc_min, width, height, wind_speed=None, air_density=None, tip=True,
+                    tip_loss=True, hub_loss=True, coefficients=None, config=None):
+    TSR, foil, chord_scale, twist_scale, no_blades = variables
+    foil_coefficients = _foil_coefficients(airfoils, coefficients)[int(foil)]
+    blade = Blade(radius, no_segments, int(no_blades), airfoils[int(foil)], config)
+    blade.design_blade(TSR)
+    blade.refix(Lc_min, width, height, tip)
+
+    air_density, wind_speed, viscosity = blade.config.environment(air_density, wind_speed)
+    x_coords, y_coords = blade.airfoil.shape()
+    twist = blade.array.twist * twist_scale
+    chord, _ = fit_chord(blade.array.chord * chord_scale, twist, x_coords, y_coords, Lc_min, width, height,
+                         blade.config.max_thickness, blade.config.t_min)
+    solution = solve_bem(blade.array.position, chord, twist, blade.array.length, radius, blade.no_blades, TSR, wind_speed,
+                         foil_coefficients, tip_loss, hub_loss, air_density=air_density, viscosity=viscosity)
+    return solved_blade(blade, chord, twist, solution)
+
+## Function to give the coefficients function of every airfoil, raising a ValueError if one has neither a polar nor a
+## function given (the stand-in of airfoil_coefficients would be optimised, not the airfoil)
+def _foil_coefficients(airfoils, coefficients=None):
+    coefficients = [None] * len(airfoils) if coefficients is None else list(coefficients)
+    missing = [foil.name for foil, function in zip(airfoils, coefficients) if function is None and foil.polar is None]
+    if missing:
+        raise ValueError(f"{', '.join(missing)} has no polar, designs off their design point need one (Airfoil.from_polar) or the coefficients")
+    return [airfoil_coefficients(foil) if function is None else function for foil, function in zip(airfoils, coefficients)]
+
+## Function to give the objectives (Cp, Ct, material volume) of one design. A design that fails, or has an element the
+## BEM solver can not solve, gets infinite objectives so that every other design beats it
+def evaluate_candidate(variables, airfoils, radius, no_segments, Lc_min, width, height, **options):
+    try:
+        blade = candidate_blade(variables, airfoils, radius, no_segments, Lc_min, width, height, **options)
+        _, _, Cp, Ct = blade.calc_power(options.get('wind_speed'), options.get('air_density'))
+        if np.all(blade.array.converged) and np.isfinite(Cp) and np.isfinite(Ct):
+            return -Cp, Ct, blade.material_volume()
+    except (ValueError, ArithmeticError, TypeError, IndexError): # a failed design is ranked last, not allowed to stop the run
+        pass
+    return np.inf, np.inf, np.inf
+
+## Function to give the front number of every design (0 for those no other design beats, 1 for those only beaten by
+## front 0, and so on), for objectives that are all minimised [design, objective]
+def non_dominated_sort(objectives):
+    objectives = np.asarray(objectives, dtype=float)
+    dominates = (np.all(objectives[:, None] <= objectives[None], axis=-1) & np.any(objectives[:, None] < objectives[None], axis=-1))
+    beaten_by = dominates.sum(axis=0)
+    rank = np.full(len(objectives), -1)
+    front = 0
+    while np.any(rank < 0):
+        current = (beaten_by == 0) & (rank < 0)
+        rank[current] = front
+        beaten_by = beaten_by - dominates[current].sum(axis=0)
+        front += 1
+    return rank
+
+## Function to give the crowding distance of every design within its front: the size of the box between its neighbours
+## in every objective (infinite at the ends of the front), so the designs that are most alone are kept
+def crowding_distance(objectives, rank):
+    objectives = np.nan_to_num(np.asarray(objectives, dtype=float), posinf=np.finfo(float).max)
+    distance = np.zeros(len(objectives))
+    for front in np.unique(rank):
+        index = np.flatnonzero(rank == front)
+        for values in objectives[index].T:
+            order = np.argsort(values, kind='stable')
+            ordered = values[order]
+            distance[index[order[[0, -1]]]] = np.inf
+            if ordered[-1] > ordered[0]:
+                distance[index[order[1:-1]]] += (ordered[2:] - ordered[:-2]) / (ordered[-1] - ordered[0])
+    return distance
+
+## Function to pick parents by binary tournament: of two random designs, the one on the better front, or the more alone
+## on the same front
+def _tournament(rng, rank, distance, number):
+    a, b = rng.integers(len(rank), size=(2, number))
+    a_wins = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (distance[a] >= distance[b]))
+    return np.where(a_wins, a, b)
+
+## Function to make children from pairs of parents, in the unit cube: simulated binary crossover, then polynomial
+## mutation (Deb and Agrawal, 1995), with distribution indices eta_c and eta_m
+def _variation(rng, parents, crossover=0.9, eta_c=15, eta_m=20):
+    number, size = parents.shape
+    first, second = parents[0::2], parents[1::2]
+
+    u = rng.random(first.shape)
+    beta = np.where(u <= 0.5, (2 * u)**(1 / (eta_c + 1)), (1 / (2 * (1 - u)))**(1 / (eta_c + 1)))
+    beta = np.where((rng.random((len(first), 1)) < crossover) & (rng.random(first.shape) < 0.5), beta, 1) # half the values of a crossed pair
+    children = np.concatenate([0.5 * ((1 + beta) * first + (1 - beta) * second), 0.5 * ((1 - beta) * first + (1 + beta) * second)])
+
+    u = rng.random(children.shape)
+    delta = np.where(u < 0.5, (2 * u)**(1 / (eta_m + 1)) - 1, 1 - (2 * (1 - u))**(1 / (eta_m + 1)))
+    children = np.where(rng.random(children.shape) < 1 / size, children + delta, children)
+    return np.clip(children, 0, 1)[:number]
+
+## Function to turn points of the unit cube into design variables (as VARIABLES): TSR and the scales linearly between
+## their bounds, the airfoil number and blade count by splitting the range into equal parts
+def _decode(unit, tsr_bounds, no_airfoils, chord_bounds, twist_bounds, blades_list):
+    def between(u, bounds):
+        return bounds[0] + u * (bounds[1] - bounds[0])
+    def choose(u, count):
+        return np.minimum((u * count).astype(int), count - 1)
+    return np.stack([between(unit[:, 0], tsr_bounds), choose(unit[:, 1], no_airfoils), between(unit[:, 2], chord_bounds),
+                     between(unit[:, 3], twist_bounds), np.asarray(blades_list)[choose(unit[:, 4], len(blades_list))]], axis=-1)
+
+## Function to find the designs that trade the highest Cp against the lowest Ct and material volume (NSGA-II, Deb et al.,
+## 2002), over the TSR, airfoil (one of the Airfoil objects given), chord and twist scaling and blade count. Each
+## design is designed, fixed to the production constraints and scaled by candidate_blade. Every generation is evaluated
+## as one batch over a pool of processes (processes=1 runs in this process), and a design that has been evaluated before
+## is not evaluated again. Every airfoil needs a polar or its coefficients (see candidate_blade). Gives the ParetoFront of
+## the last generation, whose blades can be saved with save_csv
+def optimise_pareto(airfoils, radius=c.radius, no_segments=c.no_segments, Lc_min=c.Lc_min, width=c.width, height=c.height,
+                    tsr_bounds=(3, 7), chord_bounds=(0.8, 1.2), twist_bounds=(0.8, 1.2), blades_list=(2, 3, 4), population=40,
+                    generations=25, processes=None, seed=None, **options):
+    airfoils = list(airfoils)
+    _foil_coefficients(airfoils, options.get('coefficients')) # checked here, a failed design is only ranked last
+    population += population % 2 # children are made in pairs
+    evaluate = partial(evaluate_candidate, airfoils=airfoils, radius=radius, no_segments=no_segments, Lc_min=Lc_min,
+                       width=width, height=height, **options)
+    decode = partial(_decode, tsr_bounds=tsr_bounds, no_airfoils=len(airfoils), chord_bounds=chord_bounds,
+                     twist_bounds=twist_bounds, blades_list=blades_list)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    memo = {}
+    def evaluate_all(variables):
+        todo = list(dict.fromkeys(tuple(row) for row in variables.tolist() if tuple(row) not in memo))
+        if pool is None:
+            results = list(map(evaluate, todo))
+        else:
+            results = list(pool.map(evaluate, todo, chunksize=max(1, len(todo) // (4 * processes))))
+        memo.update(zip(todo, results))
+        return np.array([memo[tuple(row)] for row in variables.tolist()], dtype=float).reshape(-1, len(OBJECTIVES))
+
+    rng = np.random.default_rng(seed)
+    try:
+        unit = rng.random((population, len(VARIABLES)))
+        variables = decode(unit)
+        objectives = evaluate_all(variables)
+        rank = non_dominated_sort(objectives)
+        distance = crowding_distance(objectives, rank)
+
+        for _ in range(generations):
+            children = _variation(rng, unit[_tournament(rng, rank, distance, population)])
+            child_variables = decode(children)
+            child_objectives = evaluate_all(child_variables)
+
+            # The best of parents and children together go on: by front, then the most alone within the last front that fits
+            unit = np.concatenate([unit, children])
+            variables = np.concatenate([variables, child_variables])
+            objectives = np.concatenate([objectives, child_objectives])
+            rank = non_dominated_sort(objectives)
+            distance = crowding_distance(objectives, rank)
+            keep = np.lexsort((-distance, rank))[:population]
+            unit, variables, objectives = unit[keep], variables[keep], objectives[keep]
+            rank = non_dominated_sort(objectives)
+            distance = crowding_distance(objectives, rank)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # The first front of the last generation, each design once and only those that could be evaluated
+    front = np.flatnonzero((rank == 0) & np.all(np.isfinite(objectives), axis=-1))
+    front = list({tuple(variables[i].tolist()): i for i in front}.values())
+    blades = [candidate_blade(tuple(variables[i]), airfoils, radius, no_segments, Lc_min, width, height, **options) for i in front]
+    front_objectives = objectives[front] * np.array([-1, 1, 1]) # Cp was minimised as -Cp
+    return ParetoFront(variables[front], front_objectives, blades, generations, len(memo))
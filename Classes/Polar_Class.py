@@ -0,0 +1,153 @@
+##### Import modules #####
+import os
+import re as regex
+import glob
+import tempfile
+import numpy as np
+
+# Columns of the polar tables, in the order they are stored
+COEFFICIENTS = ('Cl', 'Cd', 'Cm')
+
+# Version of the binary sidecar written next to each polar file, bump it when the layout changes
+SIDECAR_VERSION = 1
+
+##### Polar class #####
+# Holds the Cl, Cd and Cm of an airfoil against angle of attack [°], for one or more Reynolds numbers
+class Polar:
+
+    ## Defines the attributes of this object
+    def __init__(self, name=None, tables=None):
+        # tables: {Re: (alpha [°], Cl, Cd, Cm)}, Re is None for a single table measured at an unknown Reynolds number
+        self.name = name
+
+        if not tables:
+            raise ValueError('A polar needs at least one table')
+        if None in tables and len(tables) > 1:
+            raise ValueError('Only a single table may be given without a Reynolds number')
+
+        re_list = sorted(tables, key=lambda re: 0 if re is None else re)
+        self.re = np.array([np.nan if re is None else re for re in re_list], dtype=float)
+
+        # All the tables are put onto one common grid of angles, so a lookup is a bilinear interpolation
+        self.alpha = np.unique(np.concatenate([np.asarray(tables[re][0], dtype=float) for re in re_list]))
+        if len(self.alpha) < 2:
+            raise ValueError('A polar needs at least two angles of attack')
+
+        self.table = np.empty((len(COEFFICIENTS), len(re_list), len(self.alpha)))
+        for j, re in enumerate(re_list):
+            alpha = np.asarray(tables[re][0], dtype=float)
+            order = np.argsort(alpha)
+            for k in range(len(COEFFICIENTS)):
+                self.table[k, j] = np.interp(self.alpha, alpha[order], np.asarray(tables[re][k + 1], dtype=float)[order])
+
+        # Precomputed interpolants: slope of each interval in alpha, and log(Re) for the Reynolds number direction
+        self.slope = np.diff(self.table, axis=-1) / np.diff(self.alpha)
+        self.log_re = np.log(self.re)
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        re_text = 'unknown' if np.isnan(self.re[0]) else ', '.join(format(re, '.3g') for re in self.re)
+        return f"""##### Polar Attributes #####
+                Airfoil:     {self.name}
+                Re:          {re_text}
+                AoA [°]:     {format(self.alpha[0], '.3g')} to {format(self.alpha[-1], '.3g')}"""
+
+    ## Method to load every polar file of an airfoil, named {name}_polar.txt or {name}_polar_Re{Re}.txt
+    @classmethod
+    def load(cls, name, folder='.'):
+        tables = {}
+        for path in sorted(glob.glob(os.path.join(folder, f'{glob.escape(name)}_polar*.txt'))):
+            match = regex.fullmatch(rf'{regex.escape(name)}_polar(?:_Re([0-9.eE+]+))?\.txt', os.path.basename(path))
+            if match is None:
+                continue
+            re = float(match.group(1)) if match.group(1) else None
+            tables[re] = read_polar(path)
+
+        if not tables:
+            raise FileNotFoundError(f'No polar files found for {name} in {folder}')
+        return cls(name, tables)
+
+    ## Method to interpolate a coefficient column ('Cl', 'Cd' or 'Cm') for arrays of angles [°] and Reynolds numbers
+    def lookup(self, coefficient, alpha, re=None):
+        k = COEFFICIENTS.index(coefficient)
+        alpha = np.asarray(alpha, dtype=float)
+
+        # Position in the angle grid (clamped to the ends of the table)
+        i = np.clip(np.searchsorted(self.alpha, alpha) - 1, 0, len(self.alpha) - 2)
+        d_alpha = np.clip(alpha, self.alpha[0], self.alpha[-1]) - self.alpha[i]
+
+        if len(self.re) == 1:
+            return self.table[k, 0, i] + self.slope[k, 0, i] * d_alpha
+        if re is None:
+            raise ValueError(f'The polar of {self.name} has several Reynolds numbers, so one is needed')
+
+        # Linear in log(Re) between the two neighbouring tables (clamped to the ends)
+        log_re = np.log(np.asarray(re, dtype=float))
+        j = np.clip(np.searchsorted(self.log_re, log_re) - 1, 0, len(self.re) - 2)
+        t = np.clip((log_re - self.log_re[j]) / (self.log_re[j + 1] - self.log_re[j]), 0, 1)
+
+        lower = self.table[k, j, i] + self.slope[k, j, i] * d_alpha
+        upper = self.table[k, j + 1, i] + self.slope[k, j + 1, i] * d_alpha
+        return lower + t * (upper - lower)
+
+    ## Methods for each coefficient
+    def cl(self, alpha, re=None):
+        return self.lookup('Cl', alpha, re)
+
+    def cd(self, alpha, re=None):
+        return self.lookup('Cd', alpha, re)
+
+    def cm(self, alpha, re=None):
+        return self.lookup('Cm', alpha, re)
+
+    ## Method to find the angle of attack [°] with the highest Cl/Cd, for one or more Reynolds numbers. Returns AoA, Cl, Cd
+    def optimum(self, re=None):
+        if re is None and len(self.re) > 1: # One optimum for each table
+            re = self.re
+        re_grid = None if re is None else np.asarray(re, dtype=float)[..., None]
+
+        cl = self.cl(self.alpha, re_grid)
+        cd = self.cd(self.alpha, re_grid)
+        ratio = np.where(cd > 0, cl / np.where(cd > 0, cd, 1), -np.inf)
+        best = np.clip(ratio.argmax(axis=-1), 1, len(self.alpha) - 2)
+
+        # Refine between the grid points with the vertex of a parabola through the best three
+        a0, a1, a2 = self.alpha[best - 1], self.alpha[best], self.alpha[best + 1]
+        r0, r1, r2 = (np.take_along_axis(ratio, np.asarray(best + n)[..., None], axis=-1)[..., 0] for n in (-1, 0, 1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            denom = (a0 - a1) * (a0 - a2) * (a1 - a2)
+            A = (a2 * (r1 - r0) + a1 * (r0 - r2) + a0 * (r2 - r1)) / denom
+            B = (a2**2 * (r0 - r1) + a1**2 * (r2 - r0) + a0**2 * (r1 - r2)) / denom
+            vertex = -B / (2 * A)
+        AoA = np.where(np.isfinite(vertex) & (A < 0) & (vertex >= a0) & (vertex <= a2), vertex, a1)
+
+        return AoA, self.cl(AoA, re), self.cd(AoA, re)
+
+## Function to read a polar text file (AoA, Cl, Cd, Cm columns under one header line), using a binary sidecar when it is up to date
+def read_polar(path):
+    stat = os.stat(path)
+    sidecar = os.path.splitext(path)[0] + '.npz'
+
+    try:
+        with np.load(sidecar) as data:
+            if int(data['version']) == SIDECAR_VERSION and int(data['mtime']) == stat.st_mtime_ns and int(data['size']) == stat.st_size:
+                return data['alpha'], data['Cl'], data['Cd'], data['Cm']
+    except Exception: # missing, stale, half written or corrupt (e.g. BadZipFile, EOFError), it is parsed again
+        pass
+
+    columns = np.loadtxt(path, skiprows=1, usecols=(0, 1, 2, 3), ndmin=2)
+    alpha, cl, cd, cm = columns.T
+
+    # Written under a name of its own first, so another process never reads it half written. The sidecar only saves
+    # time, so a folder that can't be written to is not an error
+    temp_path = None
+    try:
+        handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(sidecar) or '.')
+        with os.fdopen(handle, 'wb') as file:
+            np.savez(file, version=SIDECAR_VERSION, mtime=stat.st_mtime_ns, size=stat.st_size, alpha=alpha, Cl=cl, Cd=cd, Cm=cm)
+        os.replace(temp_path, sidecar)
+    except OSError:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return alpha, cl, cd, cm
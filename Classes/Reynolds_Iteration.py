@@ -0,0 +1,37 @@
+##### Import modules #####
+import numpy as np
+
+## Function to iterate the Reynolds number of every segment of a designed blade against the airfoil's polar.
+## Each pass takes the best Cl/Cd angle at each segment's current Re, redesigns the segments that have not converged,
+## and stops a segment once its Re changes by less than tol (relative). Returns Re, Cl, Cd, AoA_opt [°] and the converged mask.
+## The physical constants are those of the blade's config unless given
+def iterate_re(blade, polar=None, tol=1e-3, max_iter=50, air_density=None, wind_speed=None, viscosity=None):
+    array = blade.array
+    if array is None:
+        raise ValueError('The blade has to be designed (design_blade) before its Reynolds numbers can be iterated')
+
+    if polar is None:
+        polar = blade.airfoil.polar
+    if polar is None:
+        raise ValueError(f'No polar is available for the airfoil {blade.airfoil.name}')
+
+    re = array.re.copy()
+    converged = np.zeros(len(array), dtype=bool)
+    AoA = np.full(len(array), np.nan)
+    Cl = np.full(len(array), np.nan)
+    Cd = np.full(len(array), np.nan)
+
+    for _ in range(max_iter):
+        index = np.flatnonzero(~converged)
+        if index.size == 0:
+            break
+
+        AoA[index], Cl[index], Cd[index] = polar.optimum(re[index])
+        array.calc_dimensions(blade.tsr, blade.no_blades, blade.radius, air_density, wind_speed, viscosity,
+                              index=index, Cl=Cl[index], Cd=Cd[index], AoA_opt=np.deg2rad(AoA[index]))
+
+        re_new = array.re[index]
+        converged[index] = np.abs(re_new - re[index]) <= tol * np.abs(re[index])
+        re[index] = re_new
+
+    return re, Cl, Cd, AoA, converged
@@ -0,0 +1,196 @@
+##### Import modules #####
+import numpy as np
+from .Airfoil_Class import Airfoil
+from .Segment_Class import Segment
+from .Induction_Solver import solve_induction
+from .Instrumentation import timed
+from .Config import DEFAULT
+
+# Names of the calculated attributes that every segment carries
+FIELDS = ('tsr', 'a_lin', 'a_ang', 'flow', 'twist', 'C_a', 'C_m', 'chord', 'dM', 'dT', 're')
+
+## Function to give the optimal linear induction factor for an array of local tip speed ratios
+def optimal_induction(tsr):
+    # Closed-form (trigonometric) root of 16a^3 - 24a^2 + (9 - 3x^2)a + (x^2 - 1) = 0
+    # Substituting a = t + 1/2 gives t^3 - 3k/16 t - k/32 = 0 with k = 1 + x^2, which always has three real roots.
+    # The middle one is the physical root, lying between 1/4 (x = 0) and 1/3 (x -> inf)
+    k = 1 + np.asarray(tsr, dtype=float)**2
+    theta = np.arccos(1 / np.sqrt(k))
+    return 0.5 + 0.5 * np.sqrt(k) * np.cos(theta / 3 - 2 * np.pi / 3)
+
+##### Segment array class #####
+# Holds all the segments of a blade as arrays, so the whole span is calculated in one pass
+class SegmentArray:
+
+    ## Defines the attributes of this object
+    def __init__(self, length=0, position=0, airfoil=None, config=None):
+        # Inputs
+        self.position = np.array(position, dtype=float, ndmin=1)                        # in terms of r/R
+        self.length = np.broadcast_to(np.asarray(length, dtype=float), self.position.shape).copy() # dr of each segment
+        self.config = DEFAULT if config is None else config                              # physical constants and material limits
+
+        if isinstance(airfoil, Airfoil):
+            self.airfoil = airfoil
+
+        else:
+            raise TypeError('Argument provided is not of the Airfoil class')
+
+        for name in FIELDS: # Calculated values start empty
+            setattr(self, name, np.full(self.position.shape, np.nan))
+
+        # Aerodynamic coefficients of each segment, the airfoil's unless calc_dimensions is given others (e.g. from a polar)
+        self.Cl = np.full(self.position.shape, float(airfoil.Cl))
+        self.Cd = np.full(self.position.shape, float(airfoil.Cd))
+        self.AoA_opt = np.full(self.position.shape, float(airfoil.AoA_opt))
+        self.converged = np.ones(self.position.shape, dtype=bool) # False where the induction factor could not be solved
+        self.bound = np.zeros(self.position.shape, dtype=np.int8)   # constraints that have set each chord (Constraint_Fit codes, or-ed)
+
+    ## Number of segments held
+    def __len__(self):
+        return len(self.position)
+
+    ## Returns a Segment that reads and writes straight into the arrays
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError('Segment index out of range')
+        return SegmentView(self, index % len(self))
+
+    ## Method to create the Segment views for every element
+    def views(self):
+        return [SegmentView(self, i) for i in range(len(self))]
+
+    ## Calculate the dimensions and values for the chosen segments (all by default) at once
+    @timed('SegmentArray.calc_dimensions')
+    def calc_dimensions(self, TSR, No_Blades, Radius, air_density=None, wind_speed=None, viscosity=None, index=slice(None), Cl=None, Cd=None, AoA_opt=None):
+        air_density, wind_speed, viscosity = self.config.environment(air_density, wind_speed, viscosity)
+        # Optional per-segment coefficients (AoA_opt in radians) replace the stored ones
+        for name, value in (('Cl', Cl), ('Cd', Cd), ('AoA_opt', AoA_opt)):
+            if value is not None:
+                getattr(self, name)[index] = value
+        Cl = self.Cl[index]
+        Cd = self.Cd[index]
+
+        tsr = TSR * self.position[index]
+        a_lin = optimal_induction(tsr)
+        a_ang = (1 - 3*a_lin) / (4*a_lin - 1)
+
+        flow = np.arctan((1-a_lin)/((1+a_ang) * tsr))
+        sin_flow = np.sin(flow)
+        cos_flow = np.cos(flow)
+        rel_velocity = wind_speed * (1-a_lin) / sin_flow
+
+        C_a = Cl * cos_flow + Cd * sin_flow
+        C_m = Cl * sin_flow - Cd * cos_flow
+
+        chord = (8 * np.pi * a_lin * tsr * sin_flow**2 * Radius) / ((1-a_lin) * No_Blades * C_a * TSR)
+        force = 0.5 * air_density * rel_velocity**2 * chord * self.length[index] * No_Blades
+
+        self.tsr[index] = tsr
+        self.a_lin[index] = a_lin
+        self.a_ang[index] = a_ang
+        self.flow[index] = flow
+        self.twist[index] = flow - self.AoA_opt[index]
+        self.C_a[index] = C_a
+        self.C_m[index] = C_m
+        self.chord[index] = chord
+        self.dM[index] = force * C_m
+        self.dT[index] = force * C_a
+        self.re[index] = air_density * rel_velocity * chord / viscosity
+        self.converged[index] = True
+
+    ## Calculate the properties of the chosen segments (all by default) given their chord lengths
+    @timed('SegmentArray.calc_properties')
+    def calc_properties(self, chord, TSR, No_Blades, Radius, tip, index=slice(None), air_density=None, wind_speed=None, viscosity=None):
+        air_density, wind_speed, viscosity = self.config.environment(air_density, wind_speed, viscosity)
+        position = self.position[index]
+        chord = np.broadcast_to(np.asarray(chord, dtype=float), position.shape)
+        Cl = self.Cl[index]
+        Cd = self.Cd[index]
+        a_lin, converged = solve_induction(chord, position, TSR, No_Blades, Radius, Cl, Cd)
+
+        # Elements that did not converge come out as NaN, and are flagged in self.converged
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tsr = TSR * position
+            a_ang = (1 - 3 * a_lin) / (4 * a_lin - 1)
+
+            flow = np.arctan((1 - a_lin) / ((1 + a_ang) * tsr))
+            sin_flow = np.sin(flow)
+            cos_flow = np.cos(flow)
+            rel_velocity = wind_speed * (1 - a_lin) / sin_flow
+
+            C_a = Cl * cos_flow + Cd * sin_flow
+            C_m = Cl * sin_flow - Cd * cos_flow
+
+            if tip:
+                tip_loss = 2 / np.pi * np.arccos(np.exp(-1 * (No_Blades * (1 - position)) / (2 * position * sin_flow)))
+            else:
+                tip_loss = 1
+
+            force = 0.5 * air_density * rel_velocity**2 * chord * self.length[index] * No_Blades * tip_loss
+
+        self.chord[index] = chord
+        self.tsr[index] = tsr
+        self.a_lin[index] = a_lin
+        self.a_ang[index] = a_ang
+        self.flow[index] = flow
+        self.twist[index] = flow - self.AoA_opt[index]
+        self.C_a[index] = C_a
+        self.C_m[index] = C_m
+        self.dM[index] = force * C_m
+        self.dT[index] = force * C_a
+        self.re[index] = air_density * rel_velocity * chord / viscosity
+        self.converged[index] = converged
+
+        return converged
+
+    ## Method to collect the positional attributes in the same layout as Blade.read_segments
+    def read_segments(self):
+        return self.position, self.chord, np.rad2deg(self.twist), self.a_lin, self.a_ang, self.dT, self.dM, self.re
+
+##### Segment view class #####
+# A Segment whose attributes live in a SegmentArray, created on demand
+class SegmentView(Segment):
+    __slots__ = ('_array', '_index')
+
+    ## Defines the attributes of this object
+    def __init__(self, array, index):
+        self._array = array
+        self._index = index
+
+    ## A view is copied as a standalone Segment, holding the current values
+    def detach(self):
+        segment = Segment(self.length, self.position, self.airfoil, self.config)
+        for name in FIELDS + ('converged',):
+            setattr(segment, name, getattr(self, name))
+        return segment
+
+    def __copy__(self):
+        return self.detach()
+
+    def __deepcopy__(self, memo):
+        return self.detach()
+
+    ## A pickled view keeps pointing into its (pickled) array
+    def __reduce__(self):
+        return SegmentView, (self._array, self._index)
+
+    @property
+    def airfoil(self):
+        return self._array.airfoil
+
+    @property
+    def config(self):
+        return self._array.config
+
+## Function to create the property that links a Segment attribute to its array
+def _array_property(name):
+    def getter(self):
+        return getattr(self._array, name)[self._index]
+
+    def setter(self, value):
+        getattr(self._array, name)[self._index] = value
+
+    return property(getter, setter)
+
+for _name in ('length', 'position', 'converged') + FIELDS:
+    setattr(SegmentView, _name, _array_property(_name))
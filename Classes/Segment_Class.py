@@ -1,19 +1,25 @@
 ##### Import modules #####
 import numpy as np
-from scipy.misc import derivative
-import copy
 from .Airfoil_Class import Airfoil
-import Inputs as c
+from .Induction_Solver import solve_induction
+from .Airfoil_Registry import scale_shape
+from .Constraint_Fit import fit_chord, fit_twist
+from .Instrumentation import timed
+from .Config import DEFAULT
 
 ##### Segment class #####
 # Defines a 3d volume of the blade, at a specific position along the blade 
 class Segment:
+    # Fixed set of attributes instead of a __dict__, as millions of segments can be held over a sweep. The calculated
+    # ones are only set by calc_dimensions/calc_properties
+    __slots__ = ('length', 'position', 'airfoil', 'config', 'converged', 'tsr', 'a_lin', 'a_ang', 'flow', 'twist', 'C_a', 'C_m', 'chord', 'dM', 'dT', 're')
 
     ## Defines the attributes of this object
-    def __init__(self, length=0, position=0, airfoil=None):
+    def __init__(self, length=0, position=0, airfoil=None, config=None):
         # Inputs
         self.length = length                # how long the segment is AKA dr
         self.position = position            # in terms of r/R (length/Total Radius)
+        self.config = DEFAULT if config is None else config # physical constants and material limits (Config)
 
         if isinstance(airfoil, Airfoil):
             self.airfoil = airfoil
@@ -34,7 +40,9 @@ class Segment:
                 Angular Induction Factor: {format(self.a_ang, '.3g')}"""
     
     ## Calculate the dimensions and values for the segment
-    def calc_dimensions(self, TSR, No_Blades, Radius, air_density=c.air_density, wind_speed=c.windspeed, viscosity=c.viscosity):
+    @timed('Segment.calc_dimensions')
+    def calc_dimensions(self, TSR, No_Blades, Radius, air_density=None, wind_speed=None, viscosity=None):
+        air_density, wind_speed, viscosity = self.config.environment(air_density, wind_speed, viscosity)
         self.tsr = TSR * self.position
         roots = np.roots([16, -24, (9-3*self.tsr**2), (-1+self.tsr**2)])
 
@@ -60,14 +68,18 @@ class Segment:
         self.dT = 0.5 * air_density * rel_velocity**2 * self.C_a * self.chord * self.length * No_Blades # * tip_loss
 
         self.re = air_density * rel_velocity * self.chord / viscosity
+        self.converged = True
 
     # Calculate the properties of the segment given a specific chord
-    def calc_properties(self, chord, TSR, No_Blades, Radius, tip, air_density=c.air_density, wind_speed=c.windspeed, viscosity=c.viscosity):
-        try:
-            self.chord = chord    
-            self.tsr = TSR * self.position
-            self.a_lin = self.find_induction(chord, TSR, No_Blades, Radius)
-            
+    @timed('Segment.calc_properties')
+    def calc_properties(self, chord, TSR, No_Blades, Radius, tip, air_density=None, wind_speed=None, viscosity=None):
+        # If the induction factor does not converge, it is NaN and so are all the outputs (see self.converged)
+        air_density, wind_speed, viscosity = self.config.environment(air_density, wind_speed, viscosity)
+        self.chord = chord
+        self.tsr = TSR * self.position
+        self.a_lin = self.find_induction(chord, TSR, No_Blades, Radius)
+
+        with np.errstate(invalid='ignore'):
             self.a_ang = (1 - 3 * self.a_lin) / (4 * self.a_lin - 1)
 
             self.flow = np.arctan((1 - self.a_lin) / ((1 + self.a_ang) * self.tsr))
@@ -86,102 +98,45 @@ class Segment:
             self.dT = 0.5 * air_density * rel_velocity**2 * self.C_a * self.chord * self.length * No_Blades * tip_loss
 
             self.re = air_density * rel_velocity * self.chord / viscosity
-            
-        except Exception as e:
-            # If there is an exception, set all the outputs to NaN
-            self.a_lin = np.nan
-            self.a_ang = np.nan
-            self.flow = np.nan
-            self.twist = np.nan
-            self.C_a = np.nan
-            self.C_m = np.nan
-            self.dM = np.nan
-            self.dT = np.nan
-            self.re = np.nan
-            print(f"Error in calc_properties: {e}")
 
     # Method to calculate the new linear induction factor, given a chord length
-    def find_induction(self, chord, TSR, No_Blades, Radius, wind_speed=c.windspeed, viscosity=c.viscosity):
-        def f(a):
-            return (No_Blades * ((wind_speed * (1 - a)) / 
-                    np.sin(np.arctan((1 - a) / (TSR * self.position * (1 + (1 - 3 * a) / (4 * a - 1))))))**2 *
-                    (self.airfoil.Cl * np.cos(np.arctan((1 - a) / (TSR * self.position * (1 + (1 - 3 * a) / (4 * a - 1))))) +
-                    self.airfoil.Cd * np.sin(np.arctan((1 - a) / (TSR * self.position * (1 + (1 - 3 * a) / (4 * a - 1)))))) * 
-                    chord * self.length - wind_speed**2 * 4 * a * (1 - a) * np.pi * self.position * Radius * self.length)
-
-        diff = 1
-        a_lin = 1 / 3
-        i = 0
-        while diff >= 0.01:  # Newton method for solving non-linear equations (max 100 iterations)
-            i += 1
-            a_new = a_lin - f(a_lin) / derivative(f, a_lin, dx=1e-6)
-            diff = abs(a_lin - a_new)
-            a_lin = a_new
-            if i >= 100:  # If iterations don't converge
-                raise Exception(f"Failed to converge after 100 iterations. Linear induction factor: {a_lin}, tip speed ratio: {TSR}")
-        
-        return a_lin
+    @timed('Segment.find_induction')
+    def find_induction(self, chord, TSR, No_Blades, Radius, wind_speed=None, viscosity=None):
+        a_lin, converged = solve_induction(chord, self.position, TSR, No_Blades, Radius, self.airfoil.Cl, self.airfoil.Cd)
+        self.converged = bool(converged)
+
+        return a_lin[()] # NaN if it failed to converge
     
     ## Method to check if the shape of the airfoil fits into the production constraints (True = fits, False = not a fit)
+    @timed('Segment.check_shape')
     def check_shape(self, Lc, width, height):
         x_coords, y_coords = self.scaled_shape()
 
-        if self.chord <= Lc or self.chord*c.max_thickness <= c.t_min:
+        if self.chord <= Lc or self.chord*self.config.max_thickness <= self.config.t_min:
             return 'Other'
 
-        for x in x_coords:
-            if x >= width/2 or x <= -width/2:
-                return False
-        
-        for y in y_coords:
-            if y >= height/2 or y <= -height/2:
-                return False
+        if np.any(np.abs(x_coords) >= width/2) or np.any(np.abs(y_coords) >= height/2):
+            return False
         
         return True
 
-    ## Method to reduce the chord size by 1% till it fits the constraints
+    ## Method to move the chord onto the edge of the constraints, if it does not fit them
+    @timed('Segment.iter_chord')
     def iter_chord(self, Lc, width, height):
-        self_copy = copy.deepcopy(self)
-
-        check = self_copy.check_shape(Lc, width, height)
-        while check == 'Other':
-            self_copy.chord = self_copy.chord * 1.01
-            check = self_copy.check_shape(Lc, width, height)
-            if check == True:
-                return self_copy.chord
-            
-        while check == False:
-            self_copy.chord = self_copy.chord * 0.99
-            check = self_copy.check_shape(Lc, width, height)
-            if check == True:
-                return self_copy.chord
+        x_coords, y_coords = self.airfoil.shape()
+        chord, _ = fit_chord(self.chord, self.twist, x_coords, y_coords, Lc, width, height, config=self.config)
+        return float(chord)
     
-    ## Method to reduce the twist angle by 1% till it fits the constraints
+    ## Method to reduce the twist angle till it fits the constraints
+    @timed('Segment.iter_twist')
     def iter_twist(self, Lc, width, height):
-        self_copy = copy.deepcopy(self)
+        if self.check_shape(Lc, width, height) != False: # Only the box depends on the twist
+            return self.twist
 
-        check = self_copy.check_shape(Lc, width, height)
-        while check == False:
-            self_copy.twist = self_copy.twist - np.deg2rad(1)
-            check = self_copy.check_shape(Lc, width, height)
-
-            if self_copy.twist == self.twist: # Break if it does a 360 without improvement
-                return self.twist
-
-        return self_copy.twist
+        x_coords, y_coords = self.airfoil.shape()
+        return float(fit_twist(self.chord, self.twist, x_coords, y_coords, width, height))
 
     ## Method to scale and rotate the airfoil coords against the chord and twist angle
     def scaled_shape(self):
         x_coords, y_coords = self.airfoil.shape()
-
-        # Scale the coordinates using the chord
-        scaled_x_coords = np.array([self.chord * x for x in x_coords])
-        scaled_y_coords = np.array([self.chord * y for y in y_coords])
-
-        # Rotate coords
-        x_rotated = scaled_x_coords * np.cos(self.twist) - scaled_y_coords * np.sin(self.twist)
-        y_rotated = scaled_x_coords * np.sin(self.twist) + scaled_y_coords * np.cos(self.twist)
-        x_rotated = x_rotated.tolist()
-        y_rotated = y_rotated.tolist()
-
-        return [x_rotated, y_rotated]
\ No newline at end of file
+        return list(scale_shape(x_coords, y_coords, self.chord, self.twist))
@@ -0,0 +1,150 @@
+##### Import modules #####
+import numpy as np
+from copy import copy
+from .Blade_Class import Blade
+from .Segment_Array_Class import SegmentArray
+from .BEM_Analysis import solve_bem, segment_coefficients
+from .Constraint_Fit import chord_limits, fit_chord
+
+## Function to give the half width and half height of unit chord outlines rotated by the twist angles, and their
+## derivatives with respect to the twist (from the point of the outline that sets each extent)
+def extents_and_slopes(x_coords, y_coords, twist):
+    twist = np.asarray(twist, dtype=float)[..., None]
+    cos_twist = np.cos(twist)
+    sin_twist = np.sin(twist)
+
+    u = x_coords * cos_twist - y_coords * sin_twist
+    v = x_coords * sin_twist + y_coords * cos_twist
+    i = np.abs(u).argmax(axis=-1)[..., None]
+    j = np.abs(v).argmax(axis=-1)[..., None]
+
+    u_max = np.take_along_axis(u, i, axis=-1)[..., 0]
+    v_max = np.take_along_axis(v, j, axis=-1)[..., 0]
+    du = np.take_along_axis(-x_coords * sin_twist - y_coords * cos_twist, i, axis=-1)[..., 0] # d(u)/d(twist) = -v
+    dv = np.take_along_axis(x_coords * cos_twist - y_coords * sin_twist, j, axis=-1)[..., 0]  # d(v)/d(twist) = u
+    return np.abs(u_max), np.abs(v_max), np.sign(u_max) * du, np.sign(v_max) * dv
+
+## Function to find the chord and twist of every segment that give the highest Cp at the blade's TSR, within the
+## production constraints (chord >= Lc_min and t_min / max_thickness, every section inside width x height). Cp comes
+## from the off-design BEM solution (solve_bem), with its gradient from central differences that are all solved in one
+## batch, and the box constraints have analytic Jacobians, so SLSQP needs a few seconds for 50+ segments.
+## Only the segments of blade.airfoil are changed (a cylinder added by prepare_blade keeps its chord). Gives a new
+## blade, holding the BEM solution so that calc_power evaluates it directly, and the scipy OptimizeResult (with its Cp).
+## The sections are moved off their design angle of attack, so the airfoil needs a polar (Airfoil.from_polar) or the
+## coefficients have to be given. The physical constants and material limits are those of the blade's config unless given
+def optimise_shape(blade, Lc_min, width, height, wind_speed=None, air_density=None, viscosity=None, max_thickness=None,
+                   t_min=None, tip_loss=True, hub_loss=True, coefficients=None, max_iter=500, ftol=1e-10, step=1e-6, margin=1e-9):
+    from scipy.optimize import minimize # only loaded when needed, it is slow to import
+
+    air_density, wind_speed, viscosity = blade.config.environment(air_density, wind_speed, viscosity)
+    max_thickness = blade.config.max_thickness if max_thickness is None else max_thickness
+    t_min = blade.config.t_min if t_min is None else t_min
+
+    pos_list, chord_list, twist_list, _, _, _, _, _ = blade.read_segments()
+    position = np.asarray(pos_list, dtype=float)
+    chord = np.asarray(chord_list, dtype=float)
+    twist = np.deg2rad(np.asarray(twist_list, dtype=float))
+    if blade.array is not None:
+        length = blade.array.length
+        airfoils = [blade.airfoil] * len(position)
+    else:
+        length = np.array([segment.length for segment in blade.segments], dtype=float)
+        airfoils = [segment.airfoil for segment in blade.segments]
+    if coefficients is None:
+        if blade.airfoil.polar is None: # the stand-in of airfoil_coefficients would be optimised, not the airfoil
+            raise ValueError(f'{blade.airfoil.name} has no polar, optimise_shape needs one (Airfoil.from_polar) or the coefficients')
+        coefficients = segment_coefficients(airfoils)
+
+    free = np.flatnonzero([foil is blade.airfoil for foil in airfoils])
+    n = len(free)
+    x_coords, y_coords = blade.airfoil.shape()
+    chord_min, _ = chord_limits(x_coords, y_coords, twist[free], Lc_min, width, height, max_thickness, t_min)
+
+    # Start from the current shape, moved inside the constraints. The chords are scaled to be of the order of the twist
+    chord[free], _ = fit_chord(chord[free], twist[free], x_coords, y_coords, Lc_min, width, height, max_thickness, t_min)
+    scale = float(np.max(chord[free]))
+    x0 = np.concatenate([chord[free] / scale, twist[free]])
+
+    def geometry(x):
+        chord_x = np.broadcast_to(chord, x.shape[:-1] + chord.shape).copy()
+        twist_x = np.broadcast_to(twist, x.shape[:-1] + twist.shape).copy()
+        chord_x[..., free] = x[..., :n] * scale
+        twist_x[..., free] = x[..., n:]
+        return chord_x, twist_x
+
+    def solve(x):
+        chord_x, twist_x = geometry(x)
+        return solve_bem(position, chord_x, twist_x, length, blade.radius, blade.no_blades, blade.tsr, wind_speed, coefficients,
+                         tip_loss, hub_loss, air_density=air_density, viscosity=viscosity)
+
+    # Cp and its gradient together. Every element is solved on its own, so the Cp of a segment only depends on its own
+    # chord and twist: stepping all the chords (then all the twists) at once gives every partial derivative, and the
+    # base point with the central steps is one batch of five geometries, whatever the number of segments
+    area = 0.5 * air_density * wind_speed**3 * np.pi * blade.radius**2
+    steps = np.zeros((5, 2 * n))
+    steps[1, :n], steps[2, :n], steps[3, n:], steps[4, n:] = step, -step, step, -step
+    memo = {}
+    def evaluate(x):
+        key = x.tobytes()
+        if key not in memo:
+            result = solve(x + steps)
+            Cp = blade.tsr * wind_speed * np.nan_to_num(result.dM[:, free]) * position[free] / area # Cp of each segment
+            memo.clear()
+            memo[key] = (-Cp[0].sum(), -np.concatenate([Cp[1] - Cp[2], Cp[3] - Cp[4]]) / (2 * step))
+        return memo[key]
+
+    # Box constraints, width / 2 - chord * half_width >= 0 and the same for the height, with their (diagonal) Jacobians
+    def box(x):
+        half_width, half_height, _, _ = extents_and_slopes(x_coords, y_coords, x[n:])
+        chord_x = x[:n] * scale
+        return np.concatenate([width / 2 * (1 - margin) - chord_x * half_width, height / 2 * (1 - margin) - chord_x * half_height])
+
+    def box_jacobian(x):
+        half_width, half_height, d_width, d_height = extents_and_slopes(x_coords, y_coords, x[n:])
+        chord_x = x[:n] * scale
+        jacobian = np.zeros((2 * n, 2 * n))
+        index = np.arange(n)
+        jacobian[index, index] = -scale * half_width
+        jacobian[index, n + index] = -chord_x * d_width
+        jacobian[n + index, index] = -scale * half_height
+        jacobian[n + index, n + index] = -chord_x * d_height
+        return jacobian
+
+    bounds = [(chord_min * (1 + margin) / scale, None)] * n + [(-np.pi / 2, np.pi / 2)] * n
+    result = minimize(lambda x: evaluate(x)[0], x0, jac=lambda x: evaluate(x)[1], method='SLSQP', bounds=bounds,
+                      constraints=[{'type': 'ineq', 'fun': box, 'jac': box_jacobian}], options={'maxiter': max_iter, 'ftol': ftol})
+
+    # The optimised blade, holding the BEM solution of its shape
+    chord_opt, twist_opt = geometry(result.x)
+    solution = solve(result.x)
+    result.Cp = float(solution.Cp)
+    return solved_blade(blade, chord_opt, twist_opt, solution), result
+
+## Function to give a copy of a blade with a new chord and twist [rad] for every segment, holding their BEM solution at
+## the blade's TSR (from solve_bem), so calc_power, save_npz and save_csv work on it as on a designed blade
+def solved_blade(blade, chord, twist, solution):
+    pos_list, _, _, _, _, _, _, _ = blade.read_segments()
+    position = np.asarray(pos_list, dtype=float)
+
+    solved = Blade(blade.radius, blade.no_segments, blade.no_blades, blade.airfoil, blade.config)
+    solved.tsr = blade.tsr
+    values = {'chord': chord, 'twist': twist, 'tsr': blade.tsr * position, 'a_lin': solution.a_lin, 'a_ang': solution.a_ang,
+              'flow': solution.flow, 'C_a': solution.Cl * np.cos(solution.flow) + solution.Cd * np.sin(solution.flow),
+              'C_m': solution.Cl * np.sin(solution.flow) - solution.Cd * np.cos(solution.flow), 'dM': solution.dM,
+              'dT': solution.dT, 're': solution.re}
+    if blade.array is not None:
+        array = SegmentArray(blade.array.length, position, blade.airfoil, blade.config)
+        for name, value in values.items():
+            setattr(array, name, np.asarray(value, dtype=float))
+        array.Cl, array.Cd, array.AoA_opt = solution.Cl, solution.Cd, np.deg2rad(solution.alpha) # the point each section runs at
+        array.converged = solution.segment_converged
+        solved._segments = None
+        solved.array = array
+    else:
+        solved.segments = [copy(segment) for segment in blade.segments]
+        for i, segment in enumerate(solved.segments):
+            for name, value in values.items():
+                setattr(segment, name, float(value[i]))
+            segment.converged = bool(solution.segment_converged[i])
+
+    return solved
@@ -0,0 +1,124 @@
+##### Import modules #####
+import numpy as np
+from .Segment_Array_Class import SegmentArray
+from .Constraint_Fit import fit_chord
+from .Config import DEFAULT
+
+# Spacings of the segment edges along the span
+SPACINGS = ('uniform', 'cosine', 'tip')
+
+## Function to map points 0 <= s <= 1 (evenly spaced) onto r/R with the chosen spacing: uniform, cosine (closer together
+## at the root and the tip) or tip (closer together towards the tip only)
+def map_span(s, spacing='uniform'):
+    s = np.asarray(s, dtype=float)
+    if spacing == 'uniform':
+        return s
+    if spacing == 'cosine':
+        return 0.5 * (1 - np.cos(np.pi * s))
+    if spacing == 'tip':
+        return np.sin(0.5 * np.pi * s)
+    raise ValueError(f'Unknown spacing {spacing}, use one of {SPACINGS}')
+
+## Function to give the no_segments + 1 segment edges along the span, in terms of r/R
+def span_edges(no_segments, spacing='uniform'):
+    return map_span(np.linspace(0, 1, no_segments + 1), spacing)
+
+##### Refinement class #####
+# The result of refine_span: Cp and Ct at every level, and the values it converged to
+class Refinement:
+
+    ## Defines the attributes of this object
+    def __init__(self, segments, Cp_levels, Ct_levels, Cp, Ct, converged, spacing, extrapolated):
+        self.segments = segments            # number of segments of each level
+        self.Cp_levels = Cp_levels          # Cp of each level (extrapolated from the one before, if extrapolated)
+        self.Ct_levels = Ct_levels
+        self.Cp = Cp                        # values of the last level
+        self.Ct = Ct
+        self.no_segments = segments[-1]     # segments needed to meet the tolerance
+        self.converged = converged          # False if max_segments was reached first
+        self.spacing = spacing
+        self.extrapolated = extrapolated
+        self.evaluations = segments[-1] + 1 # stations calculated over all levels, as every level reuses the ones before
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        return f"""##### Span Refinement #####
+                Spacing:                 {self.spacing}
+                Segments needed [-]:     {self.no_segments}
+                Stations evaluated [-]:  {self.evaluations}
+                Power Coefficient [%]:   {round(self.Cp * 100, 4)}
+                Thrust Coefficient [%]:  {round(self.Ct * 100, 4)}
+                Converged:               {self.converged}"""
+
+## Function to find the Cp and Ct of a designed (and optionally fixed) blade to within tol, with as few stations as
+## possible. The forces per unit length are calculated at the segment edges and integrated with the trapezoid rule;
+## every level halves the spacing (in s, see map_span), so the stations of the level before are all reused and only the
+## new midpoints are calculated. With extrapolate, Richardson extrapolation of the O(h^2) trapezoid error is applied
+## (4 * fine - coarse) / 3. constraints = (Lc_min, width, height) fixes every station as Blade.fix_blade does, with the
+## material limits of config (a Config, the values of Inputs.py if None), whose physical constants are used unless given
+def refine_span(airfoil, radius, no_blades, TSR, tol=1e-4, spacing='uniform', start=4, max_segments=4096, extrapolate=True,
+                constraints=None, tip=True, air_density=None, wind_speed=None, viscosity=None, config=None):
+    if spacing not in SPACINGS:
+        raise ValueError(f'Unknown spacing {spacing}, use one of {SPACINGS}')
+    config = DEFAULT if config is None else config
+    air_density, wind_speed, viscosity = config.environment(air_density, wind_speed, viscosity)
+
+    def forces(s):
+        # Torque and thrust per unit length [N] at the stations. At the root both go to zero with the chord
+        position = map_span(s, spacing)
+        dM = np.zeros(position.shape)
+        dT = np.zeros(position.shape)
+        index = np.flatnonzero(position > 0)
+
+        array = SegmentArray(1, position[index], airfoil, config)
+        array.calc_dimensions(TSR, no_blades, radius, air_density, wind_speed, viscosity)
+        if constraints is not None:
+            Lc_min, width, height = constraints
+            x_coords, y_coords = airfoil.shape()
+            chord, bound = fit_chord(array.chord, array.twist, x_coords, y_coords, Lc_min, width, height, config=config)
+            changed = np.flatnonzero(bound)
+            array.calc_properties(chord[changed], TSR, no_blades, radius, tip, index=changed, air_density=air_density,
+                                  wind_speed=wind_speed, viscosity=viscosity)
+        dM[index] = array.dM
+        dT[index] = array.dT
+        return position, dM, dT
+
+    ang_vel = TSR * wind_speed / radius
+    area = np.pi * radius**2
+    def coefficients(position, dM, dT):
+        r = position * radius
+        dr = np.diff(r)
+        torque = np.sum(0.5 * (dM[1:] * r[1:] + dM[:-1] * r[:-1]) * dr)
+        thrust = np.sum(0.5 * (dT[1:] + dT[:-1]) * dr)
+        return ang_vel * torque / (0.5 * air_density * wind_speed**3 * area), thrust / (0.5 * air_density * wind_speed**2 * area)
+
+    no_segments = start
+    s = np.linspace(0, 1, no_segments + 1)
+    position, dM, dT = forces(s)
+    Cp, Ct = coefficients(position, dM, dT)
+
+    segments, Cp_levels, Ct_levels = [no_segments], [Cp], [Ct]
+    converged = False
+    while no_segments * 2 <= max_segments:
+        # Only the midpoints are new, then they are slotted in between the stations already known
+        new_s = 0.5 * (s[1:] + s[:-1])
+        new_position, new_dM, new_dT = forces(new_s)
+        s, position, dM, dT = (np.insert(old, np.arange(1, len(old)), new) for old, new in ((s, new_s), (position, new_position), (dM, new_dM), (dT, new_dT)))
+        no_segments *= 2
+
+        fine_Cp, fine_Ct = coefficients(position, dM, dT)
+        coarse_Cp, coarse_Ct = Cp, Ct
+        if extrapolate:
+            trapz_Cp, trapz_Ct = coefficients(position[::2], dM[::2], dT[::2])
+            Cp, Ct = (4 * fine_Cp - trapz_Cp) / 3, (4 * fine_Ct - trapz_Ct) / 3
+        else:
+            Cp, Ct = fine_Cp, fine_Ct
+
+        segments.append(no_segments)
+        Cp_levels.append(Cp)
+        Ct_levels.append(Ct)
+        if abs(Cp - coarse_Cp) < tol and abs(Ct - coarse_Ct) < tol:
+            converged = True
+            break
+
+    return Refinement(segments, np.array(Cp_levels), np.array(Ct_levels), Cp, Ct, converged, spacing, extrapolate)
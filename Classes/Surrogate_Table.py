@@ -0,0 +1,196 @@
+##### Import modules #####
+import os
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from .Airfoil_Class import Airfoil
+from .Config import DEFAULT, Config
+from .TSR_Sweep import evaluate_tsr
+
+# Version of the table files, checked on reading
+TABLE_VERSION = 1
+
+# Inputs the table is interpolated over (each airfoil has its own table), and the results it holds
+AXES = ('TSR', 'width', 'height')
+VALUES = ('Cp', 'Ct', 'chord_min')
+
+# Inputs the whole table was made with
+SETTINGS = {'radius': np.float64, 'no_segments': np.int64, 'no_blades': np.int64, 'Lc_min': np.float64, 'fixes': np.int64}
+
+##### Surrogate table class #####
+# Cp, Ct and minimum chord of the designed and fixed blade over a grid of TSR x width x height for each airfoil, read
+# by interpolation, with the error of that measured against the exact chain at spot-checked points
+class SurrogateTable:
+
+    ## Defines the attributes of this object
+    def __init__(self, airfoils, axes, values, settings, config=None, errors=None):
+        self.airfoils = airfoils        # Airfoil of each table
+        self.axes = axes                # {'TSR': grid values, 'width': ..., 'height': ...}, each increasing
+        self.values = values            # {'Cp': [airfoil, TSR, width, height] array, 'Ct': ..., 'chord_min': ...}
+        self.settings = settings        # values of SETTINGS
+        self.config = DEFAULT if config is None else config
+        self.errors = {} if errors is None else errors # {method: {value: {'max': ..., 'rms': ...}}}, from spot_check
+        self._index = {foil.name: i for i, foil in enumerate(airfoils)}
+        self._splines = {}
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        lines = [f"""##### Surrogate Table #####
+                Airfoils:            {', '.join(foil.name for foil in self.airfoils)}
+                TSR [-]:             {format(self.axes['TSR'][0], '.3g')} to {format(self.axes['TSR'][-1], '.3g')} ({len(self.axes['TSR'])} points)
+                Width [m]:           {format(self.axes['width'][0], '.3g')} to {format(self.axes['width'][-1], '.3g')} ({len(self.axes['width'])} points)
+                Height [m]:          {format(self.axes['height'][0], '.3g')} to {format(self.axes['height'][-1], '.3g')} ({len(self.axes['height'])} points)
+                Designs:             {self.values['Cp'].size}"""]
+        for method, errors in self.errors.items():
+            lines.append(f"                {method + ' error:':<21}Cp {format(errors['Cp']['max'] * 100, '.2g')}% max, "
+                         f"{format(errors['Cp']['rms'] * 100, '.2g')}% rms, chord_min {format(errors['chord_min']['max'] * 1000, '.2g')} mm max")
+        return '\n'.join(lines)
+
+    ## Method to give the Cp, Ct and minimum chord at any TSR, width and height inside the grid (NaN outside it), for an
+    ## airfoil of the table (by name or number). The inputs broadcast together. 'linear' interpolation is read straight
+    ## from the 8 surrounding designs, 'cubic' uses a spline through the grid (scipy)
+    def query(self, airfoil, TSR, width, height, method='linear'):
+        foil = self._index[airfoil] if isinstance(airfoil, str) else int(airfoil)
+        point = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (TSR, width, height)))
+        if method == 'linear':
+            return tuple(self._linear(foil, point, name) for name in VALUES)
+        if method == 'cubic':
+            return tuple(self._spline(foil, name)(np.stack(point, axis=-1)).reshape(point[0].shape) for name in VALUES)
+        raise ValueError(f"Unknown method {method}, use 'linear' or 'cubic'")
+
+    ## Method to interpolate one value multilinearly: the cell of the point along every axis, then the weighted sum of
+    ## its corners
+    def _linear(self, foil, point, name):
+        table = self.values[name][foil]
+        cell = []
+        weight = []
+        outside = np.zeros(point[0].shape, dtype=bool)
+        for axis, x in zip(AXES, point):
+            grid = self.axes[axis]
+            i = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, len(grid) - 2)
+            cell.append(i)
+            weight.append((x - grid[i]) / (grid[i + 1] - grid[i]))
+            outside |= (x < grid[0]) | (x > grid[-1]) | np.isnan(x)
+
+        (i, j, k), (u, v, w) = cell, weight
+        result = np.zeros(point[0].shape)
+        for di, fu in ((0, 1 - u), (1, u)):
+            for dj, fv in ((0, 1 - v), (1, v)):
+                for dk, fw in ((0, 1 - w), (1, w)):
+                    result += fu * fv * fw * table[i + di, j + dj, k + dk]
+        return np.where(outside, np.nan, result)
+
+    ## Method to give (and keep) the cubic spline of one value of one airfoil
+    def _spline(self, foil, name):
+        if (foil, name) not in self._splines:
+            from scipy.interpolate import RegularGridInterpolator # only loaded when needed, it is slow to import
+            self._splines[foil, name] = RegularGridInterpolator(tuple(self.axes[axis] for axis in AXES), self.values[name][foil].astype(float),
+                                                                method='cubic', bounds_error=False, fill_value=np.nan)
+        return self._splines[foil, name]
+
+    ## Method to measure the error of the table against the exact design -> fix -> calc_power chain at samples random
+    ## points inside the grid, for both interpolation methods (spread over a pool of processes like the table itself).
+    ## Gives and keeps {method: {value: {'max': largest error, 'rms': root mean square error}}}
+    def spot_check(self, samples=50, seed=None, processes=None):
+        rng = np.random.default_rng(seed)
+        foil = rng.integers(len(self.airfoils), size=samples)
+        point = [rng.uniform(self.axes[axis][0], self.axes[axis][-1], samples) for axis in AXES]
+        exact = _evaluate_points(list(zip(foil.tolist(), *(x.tolist() for x in point))), self.airfoils, self.settings, self.config, processes)
+
+        self.errors = {}
+        for method in ('linear', 'cubic'):
+            if method == 'cubic' and any(len(self.axes[axis]) < 4 for axis in AXES): # the spline needs 4 points along every axis
+                continue
+            estimate = np.empty((samples, len(VALUES)))
+            for n in range(samples):
+                estimate[n] = [value.item() for value in self.query(int(foil[n]), *(x[n] for x in point), method=method)]
+            error = np.abs(estimate - exact)
+            self.errors[method] = {name: {'max': float(np.nanmax(error[:, k])), 'rms': float(np.sqrt(np.nanmean(error[:, k]**2)))}
+                                   for k, name in enumerate(VALUES)}
+        return self.errors
+
+    ## Method to write the table to a binary file (.npz, uncompressed, values in single precision)
+    def save(self, path):
+        members = {'version': np.array(TABLE_VERSION, dtype=np.int64)}
+        members['settings'] = np.array(tuple(self.settings[name] for name in SETTINGS), dtype=list(SETTINGS.items()))
+        members['config'] = np.array(self.config.astuple(), dtype=[(name, float) for name in self.config.values()])
+        name_length = max(len(foil.name) for foil in self.airfoils)
+        members['airfoils'] = np.array([(foil.name, foil.Cl, foil.Cd, np.rad2deg(foil.AoA_opt)) for foil in self.airfoils],
+                                       dtype=[('name', f'U{name_length}'), ('Cl', float), ('Cd', float), ('AoA_opt', float)])
+        for axis in AXES:
+            members[f'axis_{axis}'] = np.asarray(self.axes[axis], dtype=float)
+        members['values'] = np.stack([self.values[name] for name in VALUES]).astype(np.float32)
+        if self.errors:
+            members['errors'] = np.array([(method, name, errors[name]['max'], errors[name]['rms']) for method, errors in self.errors.items() for name in VALUES],
+                                         dtype=[('method', 'U6'), ('value', 'U9'), ('max', float), ('rms', float)])
+
+        if not path.endswith('.npz'):
+            path += '.npz'
+        with open(path + '.tmp', 'wb') as file: # written under a temporary name first, so an interrupted write is never read
+            np.savez(file, **members)
+        os.replace(path + '.tmp', path)
+        return path
+
+    ## Creates a table from a file written by save. The airfoils get the Cl, Cd and AoA_opt they were made with
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if 'version' not in data.files or int(data['version']) != TABLE_VERSION:
+                raise ValueError(f'{path} is not a version {TABLE_VERSION} surrogate table')
+            settings = {name: data['settings'][name].item() for name in SETTINGS}
+            config = Config(*data['config'].item())
+            airfoils = [Airfoil(str(name), float(Cl), float(Cd), float(AoA_opt)) for name, Cl, Cd, AoA_opt in data['airfoils'].tolist()]
+            axes = {axis: data[f'axis_{axis}'] for axis in AXES}
+            values = dict(zip(VALUES, data['values']))
+            errors = {}
+            if 'errors' in data.files:
+                for method, name, max_error, rms_error in data['errors'].tolist():
+                    errors.setdefault(method, {})[name] = {'max': max_error, 'rms': rms_error}
+        return cls(airfoils, axes, values, settings, config, errors)
+
+## Function for the pool: Cp, Ct and minimum chord of one (airfoil number, TSR, width, height) point, NaN if it fails
+def _evaluate_point(point, airfoils, settings, config):
+    foil, TSR, width, height = point
+    try:
+        return evaluate_tsr(TSR, airfoils[foil], settings['radius'], settings['no_segments'], settings['no_blades'], settings['Lc_min'],
+                            width, height, fixes=settings['fixes'], config=config)
+    except (ValueError, ArithmeticError, TypeError, IndexError): # a failed design is recorded, not allowed to stop the run
+        return np.nan, np.nan, np.nan
+
+## Function to evaluate a list of points over a pool of processes (processes=1 runs in this process), as [point, value]
+def _evaluate_points(points, airfoils, settings, config, processes=None):
+    evaluate = partial(_evaluate_point, airfoils=airfoils, settings=settings, config=config)
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes == 1 or len(points) < 2:
+        results = list(map(evaluate, points))
+    else:
+        chunksize = max(1, len(points) // (4 * processes)) # a few chunks per process keeps them all busy
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(evaluate, points, chunksize=chunksize))
+    return np.array(results, dtype=float).reshape(-1, len(VALUES))
+
+## Function to build the table: every airfoil x TSR x width x height design run through design_blade -> fix_blade ->
+## calc_power (evaluate_tsr, with the wind speed and air density of config) over a pool of processes, then the
+## interpolation checked against the exact chain at checks random points (none if 0)
+def build_table(airfoils, tsr_list, width_list, height_list, radius, no_segments, no_blades, Lc_min, fixes=2, config=None,
+                processes=None, checks=50, seed=None):
+    config = DEFAULT if config is None else config
+    airfoils = [foil if isinstance(foil, Airfoil) else Airfoil.from_polar(foil) for foil in airfoils]
+    axes = {'TSR': np.sort(np.asarray(tsr_list, dtype=float)), 'width': np.sort(np.asarray(width_list, dtype=float)),
+            'height': np.sort(np.asarray(height_list, dtype=float))}
+    if any(len(axes[axis]) < 2 for axis in AXES):
+        raise ValueError('The table needs at least 2 points along every axis')
+    settings = {'radius': float(radius), 'no_segments': int(no_segments), 'no_blades': int(no_blades), 'Lc_min': float(Lc_min), 'fixes': int(fixes)}
+
+    shape = (len(airfoils),) + tuple(len(axes[axis]) for axis in AXES)
+    grid = np.indices(shape).reshape(len(shape), -1).T
+    points = [(int(f), axes['TSR'][i], axes['width'][j], axes['height'][k]) for f, i, j, k in grid]
+    results = _evaluate_points(points, airfoils, settings, config, processes)
+    values = {name: results[:, n].reshape(shape).astype(np.float32) for n, name in enumerate(VALUES)}
+
+    table = SurrogateTable(airfoils, axes, values, settings, config)
+    if checks:
+        table.spot_check(checks, seed, processes)
+    return table
@@ -0,0 +1,61 @@
+##### Import modules #####
+import os
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from .Blade_Class import Blade
+
+## Function to design, fix and evaluate one blade at a given TSR. Returns Cp, Ct and the minimum chord
+## (a DesignCache can be given, to reuse the results of earlier runs). The blade is designed with config (a Config, the
+## values of Inputs.py if None), and wind_speed and air_density are those of the config unless given
+def evaluate_tsr(TSR, airfoil, radius, no_segments, no_blades, Lc_min, width, height, wind_speed=None, air_density=None, fixes=2, tip=True, cache=None, config=None):
+    if cache is not None:
+        blade = cache.design_blade(airfoil, radius, no_segments, no_blades, TSR, config)
+        for _ in range(fixes):
+            blade = cache.fix_blade(blade, Lc_min, width, height, tip)
+        _, _, Cp, Ct = cache.calc_power(blade, wind_speed, air_density)
+        _, chord_list, _, _, _, _, _, _ = blade.read_segments()
+        return Cp, Ct, min(chord_list)
+
+    blade = Blade(radius, no_segments, no_blades, airfoil, config)
+    blade.design_blade(TSR)
+    for _ in range(fixes): # Fixing is repeated, as in Design_Blade.py
+        blade.fix_blade(Lc_min, width, height, tip)
+
+    _, _, Cp, Ct = blade.calc_power(wind_speed, air_density, verbose=False)
+    _, chord_list, _, _, _, _, _, _ = blade.read_segments()
+    return Cp, Ct, min(chord_list)
+
+## Function to evaluate a whole grid of TSR values, spread over a pool of processes (processes=1 runs in this process)
+def sweep_tsr(tsr_list, airfoil, radius, no_segments, no_blades, Lc_min, width, height, wind_speed=None, air_density=None, fixes=2, tip=True, processes=None, cache=None, config=None):
+    tsr_list = np.asarray(tsr_list, dtype=float)
+    evaluate = partial(evaluate_tsr, airfoil=airfoil, radius=radius, no_segments=no_segments, no_blades=no_blades, Lc_min=Lc_min, width=width,
+                       height=height, wind_speed=wind_speed, air_density=air_density, fixes=fixes, tip=tip, cache=cache, config=config)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes == 1 or len(tsr_list) < 2:
+        results = list(map(evaluate, tsr_list))
+    else:
+        chunksize = max(1, len(tsr_list) // (4 * processes)) # a few chunks per process keeps them all busy
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(evaluate, tsr_list, chunksize=chunksize))
+
+    Cp_list, Ct_list, Lc_list = np.array(results, dtype=float).reshape(-1, 3).T
+    return Cp_list, Ct_list, Lc_list
+
+## Function to find the TSR with the highest Cp between two bounds, with a bounded Brent (golden-section + parabolic) search
+def optimise_tsr(bounds, airfoil, radius, no_segments, no_blades, Lc_min, width, height, wind_speed=None, air_density=None, fixes=2, tip=True, xtol=1e-3, maxiter=100, cache=None, config=None):
+    evaluate = partial(evaluate_tsr, airfoil=airfoil, radius=radius, no_segments=no_segments, no_blades=no_blades, Lc_min=Lc_min, width=width,
+                       height=height, wind_speed=wind_speed, air_density=air_density, fixes=fixes, tip=tip, cache=cache, config=config)
+
+    from scipy.optimize import minimize_scalar # only loaded when needed, it is slow to import
+
+    def objective(TSR):
+        Cp, _, _ = evaluate(TSR)
+        return -Cp if np.isfinite(Cp) else np.inf
+
+    result = minimize_scalar(objective, bounds=bounds, method='bounded', options={'xatol': xtol, 'maxiter': maxiter})
+    Cp, Ct, Lc = evaluate(result.x)
+    return result.x, Cp, Ct, Lc
@@ -0,0 +1,129 @@
+##### Import modules #####
+import numpy as np
+from .BEM_Analysis import solve_bem, segment_coefficients
+
+# Uncertain inputs, sampled as groups: polar scale factors and offset, wind speed, and the chord/twist of every segment
+GROUPS = ('Cl', 'Cd', 'AoA', 'wind', 'chord', 'twist')
+
+##### Uncertainty class #####
+# Cp and Ct of every sample of a Monte Carlo run, their spread, and the variance-based (Sobol) sensitivity to each group
+class Uncertainty:
+
+    ## Defines the attributes of this object
+    def __init__(self, Cp, Ct, converged, groups, first_order, total):
+        self.Cp = Cp                    # Cp of every sample (both base sets of the Saltelli design)
+        self.Ct = Ct
+        self.converged = converged      # fraction of the elements of each sample the BEM solver solved
+        self.groups = groups            # groups that were varied
+        self.first_order = first_order  # {'Cp': {group: S_i}, 'Ct': {...}}, the share of the variance from that group alone
+        self.total = total              # {'Cp': {group: S_Ti}, 'Ct': {...}}, including its interactions with the others
+
+    ## Method to give the mean, standard deviation and percentiles of 'Cp' or 'Ct'
+    def stats(self, name='Cp', percentiles=(5, 50, 95)):
+        values = getattr(self, name)
+        return {'mean': float(values.mean()), 'std': float(values.std(ddof=1)),
+                **{f'p{p}': float(value) for p, value in zip(percentiles, np.percentile(values, percentiles))}}
+
+    ## Defines the information that will be shown when this object is printed
+    def __str__(self):
+        Cp, Ct = self.stats('Cp'), self.stats('Ct')
+        lines = [f"""##### Uncertainty #####
+                Samples:                 {len(self.Cp)}
+                Power Coefficient [%]:   {round(Cp['mean'] * 100, 2)} +- {round(Cp['std'] * 100, 2)} (5-95%: {round(Cp['p5'] * 100, 2)} to {round(Cp['p95'] * 100, 2)})
+                Thrust Coefficient [%]:  {round(Ct['mean'] * 100, 2)} +- {round(Ct['std'] * 100, 2)} (5-95%: {round(Ct['p5'] * 100, 2)} to {round(Ct['p95'] * 100, 2)})
+                Sensitivity of Cp:       first order / total"""]
+        for group in self.groups:
+            lines.append(f"                    {group:<21}{format(self.first_order['Cp'][group], '.3f')} / {format(self.total['Cp'][group], '.3f')}")
+        return '\n'.join(lines)
+
+## Function to draw the samples of the chosen groups as standard normals, one row per sample
+def _draw(rng, samples, groups, no_segments):
+    return {group: rng.standard_normal((samples, no_segments if group in ('chord', 'twist') else 1)) for group in groups}
+
+## Function to give the Cp, Ct of a blade for a batch of samples [sample, segment], in chunks of rows at a time
+def _evaluate(blade, draws, spread, position, chord, twist, length, airfoils, wind_speed, air_density, variable_speed,
+              tip_loss, hub_loss, chunk):
+    base = segment_coefficients(airfoils)
+    area = np.pi * blade.radius**2
+    samples = len(next(iter(draws.values())))
+    zero = np.zeros((samples, 1))
+
+    Cp = np.empty(samples)
+    Ct = np.empty(samples)
+    converged = np.empty(samples)
+    for start in range(0, samples, chunk):
+        rows = slice(start, start + chunk)
+        z = {group: draws[group][rows] if group in draws else zero[rows] for group in GROUPS}
+
+        Cl_scale = 1 + spread['Cl'] * z['Cl']
+        Cd_scale = 1 + spread['Cd'] * z['Cd']
+        AoA_shift = spread['AoA'] * z['AoA'] # [°], the polar is read this much further along
+        def coefficients(alpha, re):
+            Cl, Cd = base(alpha + AoA_shift, re)
+            return Cl * Cl_scale, Cd * Cd_scale
+
+        wind = wind_speed * (1 + spread['wind'] * z['wind'])
+        tsr = blade.tsr if variable_speed else blade.tsr * wind_speed / wind # the rotor speed stays that of wind_speed
+        result = solve_bem(position, chord + spread['chord'] * z['chord'], twist + np.deg2rad(spread['twist']) * z['twist'], length,
+                           blade.radius, blade.no_blades, tsr, wind, coefficients, tip_loss, hub_loss, air_density=air_density,
+                           config=blade.config)
+
+        # Integrated as calc_power does, an element that could not be solved adds nothing
+        ang_vel = np.ravel(tsr * wind) / blade.radius
+        wind = np.ravel(wind)
+        Cp[rows] = ang_vel * np.sum(np.nan_to_num(result.dM) * position * blade.radius, axis=-1) / (0.5 * air_density * wind**3 * area)
+        Ct[rows] = np.sum(np.nan_to_num(result.dT), axis=-1) / (0.5 * air_density * wind**2 * area)
+        converged[rows] = result.segment_converged.mean(axis=-1)
+
+    return Cp, Ct, converged
+
+## Function to find the spread of a blade's Cp and Ct from the uncertainty of its polar (relative standard deviations of
+## Cl and Cd, and of the angle of attack in degrees), of the wind speed (relative) and of the machining of each segment
+## (standard deviations of the chord [m] and twist [°], independent per segment). Every sample is solved in one batched
+## BEM analysis of the blade. The sensitivity indices use the Saltelli design: two base sets of samples plus one set per
+## group, samples * (groups + 2) evaluations, with the Saltelli (2010) first order and Jansen total estimators. A group
+## with a spread of zero is left out. The rotor keeps the speed it has at wind_speed (the blade config's unless given),
+## unless variable_speed
+def monte_carlo(blade, samples=1000, Cl_std=0.05, Cd_std=0.1, AoA_std=0.5, wind_std=0.1, chord_tol=0.2e-3, twist_tol=0.5,
+                wind_speed=None, air_density=None, variable_speed=False, tip_loss=True, hub_loss=True, seed=None, chunk=2048):
+    air_density, wind_speed, _ = blade.config.environment(air_density, wind_speed)
+    spread = {'Cl': Cl_std, 'Cd': Cd_std, 'AoA': AoA_std, 'wind': wind_std, 'chord': chord_tol, 'twist': twist_tol}
+    groups = tuple(group for group in GROUPS if spread[group] > 0)
+    if not groups:
+        raise ValueError('Nothing to vary, every spread is zero')
+
+    pos_list, chord_list, twist_list, _, _, _, _, _ = blade.read_segments()
+    position = np.asarray(pos_list, dtype=float)
+    chord = np.asarray(chord_list, dtype=float)
+    twist = np.deg2rad(np.asarray(twist_list, dtype=float))
+    if blade.array is not None:
+        length = blade.array.length
+        airfoils = [blade.airfoil] * len(position)
+    else:
+        length = np.array([segment.length for segment in blade.segments], dtype=float)
+        airfoils = [segment.airfoil for segment in blade.segments]
+
+    # The two base sets, then for every group set A with that group taken from set B
+    rng = np.random.default_rng(seed)
+    A = _draw(rng, samples, groups, len(position))
+    B = _draw(rng, samples, groups, len(position))
+    sets = [A, B] + [{name: B[name] if name == group else A[name] for name in groups} for group in groups]
+    draws = {name: np.concatenate([values[name] for values in sets]) for name in groups}
+
+    Cp, Ct, converged = _evaluate(blade, draws, spread, position, chord, twist, length, airfoils, wind_speed, air_density,
+                                  variable_speed, tip_loss, hub_loss, chunk)
+
+    first_order = {}
+    total = {}
+    for name, values in (('Cp', Cp), ('Ct', Ct)):
+        values = values - values[:2 * samples].mean() # centred, as the mean is far larger than the spread
+        f_A, f_B = values[:samples], values[samples:2 * samples]
+        variance = np.var(values[:2 * samples])
+        first_order[name] = {}
+        total[name] = {}
+        for k, group in enumerate(groups):
+            f_AB = values[(k + 2) * samples:(k + 3) * samples]
+            first_order[name][group] = float(np.mean(f_B * (f_AB - f_A)) / variance) if variance > 0 else 0.0
+            total[name][group] = float(0.5 * np.mean((f_A - f_AB)**2) / variance) if variance > 0 else 0.0
+
+    return Uncertainty(Cp[:2 * samples], Ct[:2 * samples], converged[:2 * samples], groups, first_order, total)
@@ -1,4 +1,8 @@
 ## File to initialize the folder with the classes. Keep it all in one place and easily importable
+from .Config import Config
 from .Airfoil_Class import Airfoil
+from .Polar_Class import Polar
 from .Segment_Class import Segment
-from .Blade_Class import Blade
\ No newline at end of file
+from .Segment_Array_Class import SegmentArray
+from .Blade_Class import Blade
+from .TSR_Sweep import sweep_tsr, optimise_tsr
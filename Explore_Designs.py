@@ -0,0 +1,26 @@
+##### Import modules #####
+import numpy as np
+from Classes import Airfoil
+from Classes.Design_Space import design_grid, run_design_space
+import Inputs as c
+
+##### Inputs #####
+output_dir = 'Design_Space'     # results are written here, rerun the file to continue an interrupted run
+
+##### Calculations #####
+if __name__ == '__main__': # Needed for the process pool on Windows
+    grid = design_grid(airfoils=[Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)],
+                       tsr_list=np.arange(3, 7, 0.1),
+                       radius_list=[0.4, 0.45],
+                       blades_list=[2, 3],
+                       segments_list=[c.no_segments],
+                       Lc_list=[c.Lc_min],
+                       width_list=[c.width],
+                       height_list=[0.04, c.height])
+
+    results = run_design_space(grid, output_dir)
+
+    best = np.nanargmax(np.where(results['failed'], np.nan, results['Cp']))
+    print(f"{len(results['Cp'])} designs, best Cp of {round(results['Cp'][best] * 100, 2)}% with:")
+    for name in ('airfoil', 'TSR', 'radius', 'no_blades', 'no_segments', 'Lc_min', 'width', 'height'):
+        print(f'    {name}: {results[name][best]}')
@@ -2,24 +2,35 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from Classes import Airfoil, Segment, Blade
+from Classes.Span_Refinement import SPACINGS, refine_span
 import Inputs as c
 
+##### Inputs #####
+tol = 1e-5                  # [-], change in Cp and Ct between refinement levels to stop at
+
 ##### Testing #####
 foil = Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)
 
-seg_list = np.arange(1, 500, 1)
-Cp_list = []
+# Each refinement doubles the segments and reuses every station already calculated, so a handful of levels replaces
+# designing a blade for every number of segments
+for spacing in SPACINGS:
+    refinement = refine_span(foil, c.radius, c.no_blades, c.TSR, tol=tol, spacing=spacing)
+    print(refinement)
+    plt.semilogx(refinement.segments, refinement.Cp_levels * 100, 'o-', label=f'{spacing}, Richardson extrapolated')
 
+# The blade itself at the same numbers of segments, for comparison
+seg_list = 2**np.arange(2, 10)
+Cp_list = []
 for no_segments in seg_list:
     Test_blade = Blade(c.radius, no_segments, c.no_blades, airfoil=foil)
-    Test_blade.make_segment(c.TSR)
+    Test_blade.design_blade(c.TSR)
 
-    # print(Test_blade)
-    _, _, Cp, _, = Test_blade.calc_power(c.TSR, c.windspeed, c.air_density)
+    _, _, Cp, _, = Test_blade.calc_power(c.windspeed, c.air_density)
     Cp_list.append(Cp * 100)
 
-plt.plot(seg_list, Cp_list)
+plt.semilogx(seg_list, Cp_list, 'k--', label='Blade, uniform segments')
 plt.xlabel('No. of Segments [-]')
 plt.ylabel('Coefficient of Power [-]')
+plt.legend()
 plt.grid()
 plt.show()
\ No newline at end of file
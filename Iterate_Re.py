@@ -1,43 +1,32 @@
 ##### Import modules #####
 import numpy as np
 import matplotlib.pyplot as plt
-import copy
-from Classes import Airfoil, Segment, Blade
+from Classes import Airfoil, Polar, Blade
+from Classes.Reynolds_Iteration import iterate_re
+import Inputs as c
 
 ##### Inputs #####
-TSR = 5.67
-radius = 0.45
-no_segments = 10
-no_blades = 2
-tol = 0.05 # 5% tolerance for iterations
-
-##### Prepare for Iterations #####
-diff = 100
-Re = float(input('Reynolds Number:'))
-Re_list = [Re]
+TSR = c.TSR
+radius = c.radius
+no_segments = c.no_segments
+no_blades = c.no_blades
+tol = 0.001 # 0.1% tolerance for iterations
 
 ##### Iterations #####
-while diff >= tol:
-    AoA = float(input('\nAoA_opt of the airfoil:'))
-    Cl = float(input('Cl of the airfoil:'))
-    Cd = float(input('Cd of the airfoil:'))
-
-    foil = Airfoil(None, Cl, Cd, AoA)
-    piece = Segment(0, 0.7, TSR, no_blades, radius, airfoil=foil)
-    Re_new = piece.re
+polar = Polar.load(c.foil_name) # needs {foil_name}_polar.txt, or one file per Re as {foil_name}_polar_Re{Re}.txt
+foil = Airfoil.from_polar(c.foil_name, polar)
 
-    diff = abs(Re - Re_new)/Re
-    Re_list.append(Re_new)
-    Re = Re_new
+Design = Blade(radius, no_segments, no_blades, foil)
+Design.design_blade(TSR)
+Re_list, Cl_list, Cd_list, AoA_list, converged = iterate_re(Design, polar, tol)
 
-    if diff < tol:
-        print(f"""##### Iterations completed!! #####
-        Final Re:      {Re_list[-1]}
-        Final Cl:      {Cl}
-        Final Cd:      {Cd}
-        Final Cl/Cd:   {Cl/Cd}
-        Final AoA_opt: {AoA}""")
-        break
+print('##### Iterations completed!! #####')
+print(' r/R [-]   Re [-]      Cl [-]   Cd [-]    Cl/Cd [-]  AoA_opt [°]')
+for pos, Re, Cl, Cd, AoA, done in zip(Design.array.position, Re_list, Cl_list, Cd_list, AoA_list, converged):
+    print(f"{pos:8.3f}  {Re:10.0f}  {Cl:7.3f}  {Cd:8.4f}  {Cl/Cd:9.1f}  {AoA:11.2f}{'' if done else '  (not converged)'}")
 
-    else:
-        print(f"New Re: {Re * 10**-6}")
\ No newline at end of file
+plt.plot(Design.array.position, Re_list * 10**-6)
+plt.xlabel('Position r/R [-]')
+plt.ylabel('Reynolds number [10^6]')
+plt.grid()
+plt.show()
@@ -1,39 +1,29 @@
 ##### Import modules #####
 import numpy as np
 import matplotlib.pyplot as plt
-from Classes import Airfoil, Segment, Blade
+from Classes import Airfoil, sweep_tsr, optimise_tsr
 import Inputs as c
 
 ##### Testing #####
-foil = Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)
+if __name__ == '__main__': # Needed for the process pool on Windows
+    foil = Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)
 
-tsr_list = np.arange(3, 6.5, 0.01)
-Cp_list = []
-Lc_list = []
+    tsr_list = np.arange(3, 6.5, 0.01)
+    Cp_list, _, Lc_list = sweep_tsr(tsr_list, foil, c.radius, c.no_segments, c.no_blades, c.Lc_min, c.width, c.height)
+    Cp_list = Cp_list * 100
 
-for TSR in tsr_list:
-    Test_blade = Blade(c.radius, c.no_segments, c.no_blades, airfoil=foil)
-    Test_blade.design_blade(TSR)
-    Test_blade.fix_blade(c.Lc_min, c.width, c.height, tip=True)
-    Test_blade.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+    # Finding the maximum on the grid
+    idx = np.nanargmax(Cp_list)
+    print(f'Maximal Efficiency of {round(Cp_list[idx], 2)}% at TSR of {tsr_list[idx]} with min chord {Lc_list[idx]}')
 
-    _, _, Cp, _ = Test_blade.calc_power(c.windspeed, c.air_density)
-    Cp_list.append(Cp * 100)
-    _, chord_list, _, _, _, _, _, _ = Test_blade.read_segments()
-    Lc_list.append(min(chord_list))
+    # Refining it with the optimizer
+    tsr_opt, Cp_opt, _, Lc_opt = optimise_tsr((3, 6.5), foil, c.radius, c.no_segments, c.no_blades, c.Lc_min, c.width, c.height)
+    print(f'Optimizer: {round(Cp_opt*100, 2)}% at TSR of {round(tsr_opt, 3)} with min chord {Lc_opt}')
 
-# Finding the maximum
-Cp_max = max(Cp_list)
-idx = Cp_list.index(Cp_max)
-tsr_max = tsr_list[idx]
-chord_max = Lc_list[idx]
-
-print(f'Maximal Efficiency of {round(Cp_max, 2)}% at TSR of {tsr_max} with min chord {chord_max}')
-
-# First plot - Cp_list vs. tsr_list
-plt.plot(tsr_list, Cp_list, label='Cp vs TSR', color='b')
-plt.xlabel('Tip Speed Ratio (TSR) [-]')
-plt.ylabel('Coefficient of Power (Cp) [%]')
-plt.grid()
-plt.legend()
-plt.show()
\ No newline at end of file
+    # First plot - Cp_list vs. tsr_list
+    plt.plot(tsr_list, Cp_list, label='Cp vs TSR', color='b')
+    plt.xlabel('Tip Speed Ratio (TSR) [-]')
+    plt.ylabel('Coefficient of Power (Cp) [%]')
+    plt.grid()
+    plt.legend()
+    plt.show()
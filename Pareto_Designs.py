@@ -0,0 +1,32 @@
+##### Import modules #####
+import matplotlib.pyplot as plt
+from Classes import Airfoil
+from Classes.Pareto_Optimiser import optimise_pareto
+import Inputs as c
+
+##### Inputs #####
+output_dir = 'Pareto_Front'     # the blades of the front are saved here (as save_csv), with a table of them
+
+##### Calculations #####
+if __name__ == '__main__': # Needed for the process pool on Windows
+    airfoils = [Airfoil.from_polar(c.foil_name)] # needs {foil_name}_polar.txt, the designs are analysed off their design point
+
+    # Cp against Ct and material volume, over TSR, airfoil, chord and twist scaling and blade count
+    front = optimise_pareto(airfoils, c.radius, c.no_segments, c.Lc_min, c.width, c.height,
+                            tsr_bounds=(3, 7), chord_bounds=(0.8, 1.2), twist_bounds=(0.8, 1.2), blades_list=(2, 3, 4),
+                            population=40, generations=25, seed=0)
+    print(front)
+    front.save_csv(output_dir)
+
+    ##### Plotting #####
+    fig, (ax_ct, ax_vol) = plt.subplots(1, 2, figsize=(11, 4))
+    points = ax_ct.scatter(front.objectives[:, 1] * 100, front.objectives[:, 0] * 100, c=front.variables[:, 0])
+    ax_ct.set_xlabel('Thrust Coefficient [%]')
+    ax_ct.set_ylabel('Power Coefficient [%]')
+    fig.colorbar(points, ax=ax_ct, label='TSR [-]')
+    points = ax_vol.scatter(front.objectives[:, 2] * 1e6, front.objectives[:, 0] * 100, c=front.variables[:, 4])
+    ax_vol.set_xlabel('Material Volume [cm^3]')
+    ax_vol.set_ylabel('Power Coefficient [%]')
+    fig.colorbar(points, ax=ax_vol, label='No. Blades [-]')
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,33 @@
+##### Import modules #####
+import numpy as np
+import matplotlib.pyplot as plt
+from Classes import Airfoil, Blade
+from Classes.Uncertainty import monte_carlo
+import Inputs as c
+
+##### Calculations #####
+Foil = Airfoil(c.foil_name, c.Cl, c.Cd, c.AoA_opt)
+
+Design = Blade(c.radius, c.no_segments, c.no_blades, Foil)
+Design.design_blade(c.TSR)
+Design.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+Design.fix_blade(c.Lc_min, c.width, c.height, tip=True)
+
+# Spread of Cp and Ct from the polar, the wind speed and the machining tolerances, with the share of each
+Result = monte_carlo(Design, samples=2000, Cl_std=0.05, Cd_std=0.1, AoA_std=0.5, wind_std=0.1, chord_tol=0.2e-3, twist_tol=0.5, seed=0)
+print(Result)
+
+##### Plotting #####
+fig, (ax_hist, ax_bar) = plt.subplots(1, 2, figsize=(11, 4))
+ax_hist.hist(Result.Cp * 100, bins=50)
+ax_hist.set_xlabel('Power Coefficient [%]')
+ax_hist.set_ylabel('Samples')
+
+x = np.arange(len(Result.groups))
+ax_bar.bar(x - 0.2, [Result.first_order['Cp'][group] for group in Result.groups], 0.4, label='First order')
+ax_bar.bar(x + 0.2, [Result.total['Cp'][group] for group in Result.groups], 0.4, label='Total')
+ax_bar.set_xticks(x, Result.groups)
+ax_bar.set_ylabel('Sensitivity of Cp [-]')
+ax_bar.legend()
+plt.tight_layout()
+plt.show()